@@ -0,0 +1,255 @@
+import sys
+import os
+import math
+import time
+import json
+import shutil
+import tempfile
+import argparse
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import QuickMarch as qm
+
+#Benchmarks of the QuickMarch engine and rendering. The choreographies of the
+#examples are rebuilt with a variable band size, and their command sequence is
+#repeated to vary the length of the show. The time spent in BandCls.setTime,
+#BandCls.plot and makeOutput is measured separately, and reported as JSON.
+#
+#Example:
+#python Benchmark.py --shows Counters,Star --sizes 8x4,32x16 --repeats 1,8 --output bench.json
+
+
+#----------Choreographies------------------
+#Each function returns a BandCls of "Size" ([Rows, Columns]) with the commands of
+#the example repeated "Repeats" times.
+
+def Counters(Size,Repeats = 1):
+    Band = qm.BandCls(Size,Angle = 90)
+    for n in range(Repeats):
+        qm.QuickMarch(Band,16)
+        qm.EnglishCounter(Band)
+        qm.QuickMarch(Band,16)
+        qm.Bend(Band,90)
+        qm.QuickMarch(Band,16)
+        qm.AmericanCounter(Band)
+    qm.QuickMarch(Band,100)
+    return Band
+
+def Turns(Size,Repeats = 1):
+    Band = qm.BandCls(Size,Angle = 90)
+    for n in range(Repeats):
+        qm.QuickMarch(Band,16)
+        qm.EnglishCounter(Band)
+        qm.QuickMarchReturn(Band)
+        qm.Turn(Band,-90)
+        qm.QuickMarch(Band,10)
+        qm.Turn(Band,90)
+        qm.QuickMarch(Band,4)
+        qm.Bend(Band,90)
+        qm.QuickMarchReturn(Band)
+    qm.QuickMarch(Band,100)
+    return Band
+
+def TurnOddEven(Band, Angles, TotalBeats = 2):
+    """
+    Turn Band in place, with angle depending on the row odd/even (see Examples/45deg.py)
+    """
+    for Player in Band.BandList:
+        if Player.Row%2 == 0: #if even row
+            Angle = Angles[0]
+        else:
+            Angle= Angles[1]
+        qm.BendBase(Player,0,Band.LastCTime,Angle,TotalBeats)
+    Band.LastCTime += TotalBeats
+
+def Deg45(Size,Repeats = 1):
+    Band = qm.BandCls(Size,Angle = 90)
+    for n in range(Repeats):
+        qm.QuickMarch(Band,4)
+        TurnOddEven(Band, [45, -45])
+        qm.QuickMarch(Band,10)
+        qm.Turn(Band,180)
+        qm.QuickMarch(Band,10)
+        TurnOddEven(Band, [135,-135])
+    qm.QuickMarch(Band,100)
+    return Band
+
+def DoubleBend(Size,Repeats = 1):
+    Band = qm.BandCls(Size,Angle = 90)
+    for n in range(Repeats):
+        qm.QuickMarch(Band,2)
+        qm.Bend(Band,90)
+        qm.Bend(Band,-90)
+    qm.QuickMarch(Band,100)
+    return Band
+
+def Star(Band,MarchTime):
+    """
+    Star move of Examples/Star.py, generalised to any number of columns: the
+    split angles are spread evenly from -90 to 90 degrees. The middle column of
+    an odd number of columns (angle 0) walks straight on, without turning.
+    """
+    Radius = 0.2 * Band.Sep[1]
+    for Player in Band.BandList:
+        BendTime = (Radius * math.pi) / Player.StartStride
+        if Band.Columns > 1:
+            Angle = -90 + 180 * Player.Column / (Band.Columns - 1)
+        else:
+            Angle = 0
+        BackAngle = 180 if Angle > 0 else -180
+        if Player.Row > 0 and not Band.StartEqual:
+            qm.QuickMarchBase(Player,Band.LastCTime,Player.Row * Band.Sep[0] / Player.StartStride)
+        tmpTime = Band.LastCTime
+        if Angle != 0: #A turn of 0 degrees has no length
+            tmpTime = qm.BendBase(Player,0,tmpTime,Angle,TotalBeats = 0)
+        tmpTime = qm.QuickMarchBase(Player,tmpTime,MarchTime)
+        tmpTime = qm.BendBase(Player,Radius,tmpTime,BackAngle,TotalBeats = BendTime)
+        tmpTime = qm.QuickMarchBase(Player,tmpTime,MarchTime)
+        if Angle != 0:
+            tmpTime = qm.BendBase(Player,0,tmpTime,-Angle,TotalBeats = 0)
+    Band.StartEqual = True
+    Band.LastCTime = tmpTime
+
+def StarShow(Size,Repeats = 1):
+    Band = qm.BandCls(Size,Angle = 90)
+    for n in range(Repeats):
+        qm.QuickMarch(Band,2)
+        Star(Band,16)
+    qm.QuickMarch(Band,100)
+    return Band
+
+Shows = {'Counters': Counters, 'Turns': Turns, '45deg': Deg45, 'DoubleBend': DoubleBend, 'Star': StarShow}
+
+
+#----------Measurements------------------
+
+def timeSetTime(Band,Frames,dt):
+    """
+    Returns the time (s) to evaluate "Frames" frames with BandCls.setTime
+    """
+    Start = time.perf_counter()
+    for Frame in range(Frames):
+        Band.setTime(Frame * dt)
+    return time.perf_counter() - Start
+
+def timePlot(Band,Frames,dt,Folder,dpi,PlotLimits):
+    """
+    Returns the time (s) spent in BandCls.plot for "Frames" frames
+    """
+    Total = 0
+    Fig = None
+    ax = None
+    for Frame in range(Frames):
+        Band.setTime(Frame * dt)
+        Start = time.perf_counter()
+        Fig, ax = Band.plot(os.path.join(Folder, 'plot.png'), Fig, ax, limits = PlotLimits, dpi = dpi)
+        Total += time.perf_counter() - Start
+    qm.loadPyplot().close(Fig)
+    return Total
+
+def timeMakeOutput(Band,Frames,dt,Folder,dpi,PlotLimits,**Options):
+    """
+    Returns the time (s) of makeOutput for "Frames" frames
+    """
+    Start = time.perf_counter()
+    qm.makeOutput(Band,os.path.join(Folder, 'out', ''),Frames,dt,PlotLimits,dpi,Clean = True,**Options)
+    return time.perf_counter() - Start
+
+def peakMemory(Function,*args,**kwargs):
+    """
+    Returns the peak memory (bytes) allocated by Python while running "Function"
+    """
+    tracemalloc.start()
+    try:
+        Function(*args,**kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def runBenchmark(Show,Size,Repeats,Frames,dt = 0.2,dpi = 150,PlotLimits = [[-20,20],[-60,65]],
+                 Engine = False,Plot = True,Memory = True,**Options):
+    """
+    Benchmark a single show. Returns a dict with the results.
+
+    Inputs:
+    Show: name of the show in Shows
+    Size: [Rows, Columns]
+    Repeats: number of repeats of the command sequence
+    Frames: number of frames. If None, the full show is rendered.
+    dt (optional = 0.2): time in beats between each frame
+    dpi (optional = 150): resolution of output picture
+    PlotLimits (optional): plot limits
+    Engine (optional = False): use the array-backed engine (BandCls.useEngine)
+    Plot (optional = True): also time BandCls.plot and makeOutput
+    Memory (optional = True): also measure the peak memory
+    Options: further options of makeOutput (e.g. workers, Backend)
+    """
+    Start = time.perf_counter()
+    Band = Shows[Show](Size,Repeats)
+    Define = time.perf_counter() - Start
+    if Frames is None:
+        Frames = int(math.ceil(Band.LastCTime / dt))
+    Players = len(Band.BandList)
+    Result = {'show': Show, 'rows': Size[0], 'columns': Size[1], 'players': Players,
+              'repeats': Repeats, 'frames': Frames, 'dt': dt, 'dpi': dpi, 'engine': Engine,
+              'segments': sum(len(Player.Path) for Player in Band.BandList),
+              'commands': sum(len(Player.Commands) for Player in Band.BandList),
+              'define_s': Define, 'options': dict((Key, str(Value)) for Key, Value in Options.items())}
+
+    def Stage(Name, Seconds):
+        Result[Name + '_s'] = Seconds
+        Result[Name + '_fps'] = Frames / Seconds if Seconds > 0 else None
+        Result[Name + '_us_per_player'] = 1e6 * Seconds / (Frames * Players) if Players else None
+
+    if Engine:
+        Band.useEngine()
+    Stage('setTime', timeSetTime(Band,Frames,dt))
+    if Memory:
+        Result['setTime_peak_bytes'] = peakMemory(timeSetTime,Band,Frames,dt)
+    if Plot:
+        Folder = tempfile.mkdtemp(prefix = 'QuickMarchBench')
+        try:
+            Stage('plot', timePlot(Band,Frames,dt,Folder,dpi,PlotLimits))
+            Stage('makeOutput', timeMakeOutput(Band,Frames,dt,Folder,dpi,PlotLimits,**Options))
+            if Memory:
+                Result['makeOutput_peak_bytes'] = peakMemory(timeMakeOutput,Band,Frames,dt,Folder,dpi,PlotLimits,**Options)
+        finally:
+            shutil.rmtree(Folder)
+    return Result
+
+
+def main(Arguments = None):
+    Parser = argparse.ArgumentParser(description = 'Benchmark QuickMarch engine and rendering')
+    Parser.add_argument('--shows', default = ','.join(sorted(Shows)), help = 'comma separated show names')
+    Parser.add_argument('--sizes', default = '8x4,16x8,32x16', help = 'comma separated RowsxColumns')
+    Parser.add_argument('--repeats', default = '1', help = 'comma separated repeat counts')
+    Parser.add_argument('--frames', type = int, default = 100, help = 'frames per show (0 for the full show)')
+    Parser.add_argument('--dt', type = float, default = 0.2)
+    Parser.add_argument('--dpi', type = float, default = 150)
+    Parser.add_argument('--engine', action = 'store_true', help = 'use the array-backed engine')
+    Parser.add_argument('--no-plot', action = 'store_true', help = 'only time setTime')
+    Parser.add_argument('--no-memory', action = 'store_true', help = 'skip peak memory measurements')
+    Parser.add_argument('--workers', type = int, default = 1, help = 'workers of makeOutput')
+    Parser.add_argument('--backend', default = 'matplotlib', help = 'rendering backend of makeOutput')
+    Parser.add_argument('--output', default = None, help = 'JSON output file (default: stdout)')
+    Args = Parser.parse_args(Arguments)
+
+    Results = []
+    for Show in Args.shows.split(','):
+        for Size in Args.sizes.split(','):
+            Size = [int(x) for x in Size.split('x')]
+            for Repeats in Args.repeats.split(','):
+                Results.append(runBenchmark(Show, Size, int(Repeats), Args.frames or None, Args.dt, Args.dpi,
+                                            Engine = Args.engine, Plot = not Args.no_plot,
+                                            Memory = not Args.no_memory, workers = Args.workers,
+                                            Backend = Args.backend))
+                print(Show, Size, Repeats, 'done', file = sys.stderr)
+    Output = json.dumps(Results, indent = 1)
+    if Args.output is None:
+        print(Output)
+    else:
+        with open(Args.output, 'w') as f:
+            f.write(Output)
+
+if __name__ == '__main__':
+    main()
@@ -22,7 +22,7 @@ def TurnOddEven(Band, Angles, TotalBeats = 2):
             Angle = Angles[0]
         else:
             Angle= Angles[1]
-        qm.BendBase(Player,1e-6,Band.LastCTime,Angle,TotalBeats)
+        qm.BendBase(Player,0,Band.LastCTime,Angle,TotalBeats)
     Band.LastCTime += TotalBeats
 
 #Create Band    
@@ -48,5 +48,5 @@ qm.makeOutput(Band,folder,steps,dt)
 
 #--------Make movie------------------
 framerate = 1.0 / (60.0 / bpm * dt)
-command = 'ffmpeg -r  ' + str(framerate) + ' -f image2 -i ' + folder + '%d.png -vcodec libx264rgb -preset slow -qp 0 ' + folder + 'output.mkv'
+command = 'ffmpeg -y -r  ' + str(framerate) + ' -f image2 -i ' + folder + '%d.png -vcodec libx264rgb -preset slow -qp 0 ' + folder + 'output.mkv'
 os.system(command)
@@ -21,23 +21,23 @@ def Star(Band,MarchTime):
     Radius = 0.2 * Band.Sep[1] #Return bend should be small, 0.2 times the column sep in this case
 
     for Player in Band.BandList:
-        BendTime = (Radius * math.pi) / Player.Stride
+        BendTime = (Radius * math.pi) / Player.StartStride
         Column = Player.Column
         Angle = AngleList[Column]
         BackAngle = BackAngleList[Column]
         if Player.Row > 0 and not Band.StartEqual: #Let rows behind the first move straight to the start of the star
-            qm.QuickMarchBase(Player,Band.LastCTime,Player.Row * Band.Sep[0] / Player.Stride)
+            qm.QuickMarchBase(Player,Band.LastCTime,Player.Row * Band.Sep[0] / Player.StartStride)
         
-        #Turn1 (radius very small, but must be non-zero)
-        tmpTime = qm.BendBase(Player,1e-6,Band.LastCTime,Angle,TotalBeats = 0)
+        #Turn1 (radius 0: rotate in place)
+        tmpTime = qm.BendBase(Player,0,Band.LastCTime,Angle,TotalBeats = 0)
         #Straight1
         tmpTime = qm.QuickMarchBase(Player,tmpTime,MarchTime)
         #Bend
         tmpTime = qm.BendBase(Player,0.2 * Band.Sep[1],tmpTime,BackAngle,TotalBeats = BendTime)
         #Straight2
         tmpTime = qm.QuickMarchBase(Player,tmpTime,MarchTime)
-        #Turn2 (radius very small, but must be non-zero)
-        tmpTime = qm.BendBase(Player,1e-6,tmpTime,-Angle,TotalBeats = 0)
+        #Turn2 (radius 0: rotate in place)
+        tmpTime = qm.BendBase(Player,0,tmpTime,-Angle,TotalBeats = 0)
     Band.StartEqual = True #All players have now been defined up to the same position
     Band.LastCTime = tmpTime #Set the time of the last position of the band
 
@@ -61,5 +61,5 @@ qm.makeOutput(Band,folder,steps,dt)
 
 #--------Make movie------------------
 framerate = 1.0 / (60.0 / bpm * dt)
-command = 'ffmpeg -r  ' + str(framerate) + ' -f image2 -i ' + folder + '%d.png -vcodec libx264rgb -preset slow -qp 0 ' + folder + 'output.mkv'
+command = 'ffmpeg -y -r  ' + str(framerate) + ' -f image2 -i ' + folder + '%d.png -vcodec libx264rgb -preset slow -qp 0 ' + folder + 'output.mkv'
 os.system(command)
@@ -34,5 +34,5 @@ qm.makeOutput(Band,folder,steps,dt)
 
 #--------Make movie------------------
 framerate = 1.0 / (60.0 / bpm * dt)
-command = 'ffmpeg -r  ' + str(framerate) + ' -f image2 -i ' + folder + '%d.png -vcodec libx264rgb -preset slow -qp 0 ' + folder + 'output.mkv'
+command = 'ffmpeg -y -r  ' + str(framerate) + ' -f image2 -i ' + folder + '%d.png -vcodec libx264rgb -preset slow -qp 0 ' + folder + 'output.mkv'
 os.system(command)
@@ -0,0 +1,328 @@
+import numpy as np
+import math
+from .Engine import StraightCls, ArcCls, RotateCls
+from .Engine import getStraightShape, getArcShape, getRotateShape, makeSegments
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Path builders and band commands.
+
+def QuickMarchBase(Player,Time,TotalBeats):
+    """
+    Base function for a straight path. It adds all required path and commands
+    to the "Player" for a path of duration "TotalBeats". Stride length is not changed.
+    """
+    pathdist = TotalBeats * Player.StartStride
+
+    startpos = Player.Path[-1].EndPos #start pos of previous path
+    startangle = Player.Path[-1].EndAngle #start angle of previous path
+
+    Player.addPath(StraightCls(startpos,startangle,pathdist))
+    return Time + TotalBeats
+               
+    
+def BendBase(Player,Radius,Time,Angle,TotalBeats = 2):
+    """
+    Base function for a bend. It adds all required path and commands
+    to the "Player" for a path of duration "TotalBeats". 
+    Other input is:
+    Radius: the radius of the bend that the player must make. A radius of 0 rotates
+    the player in place.
+    Time: the time the change in speed should start
+    Angle: the angle of the bend (positive angles are bends to the right)
+    """
+    StartPos = Player.Path[-1].EndPos #Start Pos of previous path
+    StartAngle = Player.Path[-1].EndAngle #Start Angle of previous path
+
+    if Radius == 0: #Rotate in place
+        Segment = RotateCls(StartPos,StartAngle,Angle)
+    else:
+        Segment = ArcCls(StartPos,StartAngle,Radius,Angle)
+    PathDist = Segment.Length
+    Player.addPath(Segment)
+   
+    endTime = Time + TotalBeats
+    if TotalBeats > 0: #If no time, no speed changes are needed
+        Player.addCommand(Time ,PathDist / TotalBeats)
+        Player.addCommand(endTime, Player.StartStride) #Reset stride
+    return endTime
+
+
+def _uniqueShapes(Create,*Values):
+    """
+    Returns the shapes made by "Create" for each distinct combination of "Values"
+    (arrays over the players), and the index of the shape of each player.
+    """
+    Unique, Inverse = np.unique(np.stack(Values, axis = 1), axis = 0, return_inverse = True)
+    return [Create(*Key) for Key in Unique.tolist()], Inverse.reshape(-1)
+
+
+class BatchCls:
+    """
+    Paths and commands that are added to all players of a band at once.
+    The end positions, angles and strides of the players are kept as arrays, and
+    the shapes are made once for each distinct segment (e.g. once per column).
+    The paths are the same as those made by QuickMarchBase and BendBase for each
+    player. "apply" must be called when all paths have been added.
+
+    Inputs:
+    Band: the BandCls object
+    """
+    def __init__(self,Band):
+        self.Band = Band
+        self.Players = Band.BandList
+        Ends = getattr(Band, 'PathEnds', None)
+        if Ends is not None and Ends[0] == Band.Version and len(Ends[2]) == len(self.Players):
+            self.Pos = Ends[1].copy()
+            self.Angle = Ends[2].copy()
+        else:
+            Ends = [Player.Path[-1] for Player in self.Players]
+            self.Pos = np.array([Segment.EndPos for Segment in Ends], dtype = float).reshape(-1,2)
+            self.Angle = np.array([Segment.EndAngle for Segment in Ends], dtype = float)
+        self.Stride = np.array([Player.StartStride for Player in self.Players], dtype = float)
+        self.Row = np.array([Player.Row for Player in self.Players], dtype = int)
+        self.Column = np.array([Player.Column for Player in self.Players], dtype = int)
+        self.Changed = np.zeros(len(self.Players), dtype = bool)
+
+    def straight(self,TotalBeats,Select = None):
+        """
+        Walk in a straight line for "TotalBeats" (float, or array over the players)
+        with the start stride (as QuickMarchBase).
+
+        Inputs:
+        TotalBeats: duration of the walk
+        Select (optional = None): boolean array of the players that walk (default all)
+        """
+        Length = np.broadcast_to(TotalBeats * self.Stride, self.Angle.shape)
+        Index = np.arange(len(self.Players)) if Select is None else np.flatnonzero(Select)
+        if not len(Index):
+            return
+        Length = Length[Index]
+        Shapes, Inverse = _uniqueShapes(getStraightShape, self.Angle[Index], Length)
+        Direction = np.array([Shape.Direction for Shape in Shapes])[Inverse]
+        X = self.Pos[Index,0]
+        Y = self.Pos[Index,1]
+        Shapes = [Shapes[i] for i in Inverse.tolist()]
+        self._append(Index, makeSegments(StraightCls, Shapes, X.tolist(), Y.tolist()), Shapes)
+        self.Pos[Index,0] = X + Direction[:,0] * Length
+        self.Pos[Index,1] = Y + Direction[:,1] * Length
+
+    def leadIn(self):
+        """
+        If the band does not start at the same place, let each row walk up to the
+        position of the first row (the lead-in of a bend or counter).
+        """
+        if not self.Band.StartEqual:
+            self.straight(self.Row * self.Band.Sep[0] / self.Stride, self.Row > 0)
+
+    def bend(self,Radius,Time,Angle,TotalBeats):
+        """
+        Make a bend for all players (as BendBase).
+
+        Inputs:
+        Radius: radius of the bend (float, or array over the players). A radius of 0 rotates
+        the player in place.
+        Time: the time the change in speed should start
+        Angle: the angle of the bend (float, or array over the players)
+        TotalBeats: duration of the bend (float, or array over the players)
+        """
+        Count = len(self.Players)
+        Radius = np.broadcast_to(np.asarray(Radius, dtype = float), (Count,))
+        Angle = np.broadcast_to(np.asarray(Angle, dtype = float), (Count,))
+        Length = [0.0] * Count
+        #Rotations in place
+        Index = np.flatnonzero(Radius == 0)
+        if len(Index):
+            Shapes, Inverse = _uniqueShapes(getRotateShape, self.Angle[Index], Angle[Index])
+            Shapes = [Shapes[i] for i in Inverse.tolist()]
+            X = self.Pos[Index,0].tolist()
+            Y = self.Pos[Index,1].tolist()
+            self._append(Index, makeSegments(RotateCls, Shapes, X, Y), Shapes, Length)
+            self.Angle[Index] = [Shape.EndAngle for Shape in Shapes]
+        #Arcs
+        Index = np.flatnonzero(Radius != 0)
+        if len(Index):
+            Shapes, Inverse = _uniqueShapes(lambda StartAngle, Radius, Angle, Sign: getArcShape(StartAngle, Radius, Angle),
+                                            self.Angle[Index], Radius[Index], Angle[Index], np.copysign(1, Angle[Index]))
+            Offset = np.array([Shape.Offset for Shape in Shapes])[Inverse]
+            EndOffset = np.array([Shape.EndOffset for Shape in Shapes])[Inverse]
+            Shapes = [Shapes[i] for i in Inverse.tolist()]
+            X = self.Pos[Index,0] + Offset[:,0]
+            Y = self.Pos[Index,1] - Offset[:,1]
+            self._append(Index, makeSegments(ArcCls, Shapes, X.tolist(), Y.tolist()), Shapes, Length)
+            self.Pos[Index,0] = X + EndOffset[:,0]
+            self.Pos[Index,1] = Y + EndOffset[:,1]
+            self.Angle[Index] = [Shape.EndAngle for Shape in Shapes]
+        #Stride commands
+        if np.ndim(TotalBeats) == 0:
+            TotalBeats = [TotalBeats] * Count
+        else:
+            TotalBeats = np.asarray(TotalBeats).tolist()
+        Shared = self.Band.SharedCommands
+        for i, Player, PathDist, Beats in zip(range(Count), self.Players, Length, TotalBeats):
+            if Beats > 0: #If no time, no speed changes are needed
+                Command = (Time, PathDist / Beats)
+                Player.Commands.append(Shared.setdefault(Command, Command))
+                Command = (Time + Beats, Player.StartStride) #Reset stride
+                Player.Commands.append(Shared.setdefault(Command, Command))
+                self.Changed[i] = True
+
+    def _append(self,Index,Segments,Shapes,Length = None):
+        """
+        Append "Segments" with "Shapes" to the players with "Index". The lengths
+        are also stored in "Length" (list over all players), if given.
+        """
+        Players = self.Players
+        for i, Segment, Shape in zip(Index.tolist(), Segments, Shapes):
+            Player = Players[i]
+            Player.Path.append(Segment)
+            CumDist = Player.CumDist
+            CumDist.append(CumDist[-1] + Shape.Length)
+            if Length is not None:
+                Length[i] = Shape.Length
+        self.Changed[Index] = True
+
+    def apply(self):
+        """
+        Mark the changed players, and keep the end positions and angles in the band
+        for the next band command.
+        """
+        Band = self.Band
+        for i in np.flatnonzero(self.Changed).tolist():
+            self.Players[i].changed()
+        self.Changed[:] = False
+        Band.PathEnds = (Band.Version, self.Pos.copy(), self.Angle.copy())
+
+
+def QuickMarch(Band,TotalBeats):
+    """
+    Walk in a straight line for "TotalBeats" time.
+
+    Input:
+    Band: the BandCls object
+    TotalBeats: float of the total number of beats the walk should last
+    """
+    Batch = BatchCls(Band)
+    Batch.straight(TotalBeats)
+    Batch.apply()
+    Band.LastCTime += TotalBeats
+
+def Bend(Band,Angle,TotalBeats=16):
+    """
+    Make a bend. Radii are based on the columns of the players. The
+    innermost column has radius of 0 (it rotates in place), while the other columns remain
+    their regular separation apart.
+
+    Input:
+    Band: the BandCls object
+    Angle: the angle of the bend (positive for right, negative for left)
+    TotalBeats (optional = 16): float of the total number of beats the walk should last
+    SameStart (optional = False): bool, specifies if the path before this bend end
+    at the same place or not.
+    """
+    Batch = BatchCls(Band)
+    Batch.leadIn()
+    if Angle < 0:
+        Radius = Batch.Column * Band.Sep[1]
+    else:
+        Radius = (Band.Columns - Batch.Column - 1) * Band.Sep[1]
+    Batch.bend(Radius,Band.LastCTime,Angle,TotalBeats)
+    Batch.apply()
+    Band.StartEqual = True #All players have now been defined up to the same position
+    Band.LastCTime += TotalBeats
+
+
+def Turn(Band,Angle,TotalBeats = 2):
+    """
+    Turn Band in place
+
+    Input:
+    Band: BandCls object
+    Time: time of the start of the turn
+    Angle: rotation angle (positive for right, negative for left)
+    TotalBeats (optional = 2): number of beats of the movement
+    """
+    Batch = BatchCls(Band)
+    Batch.bend(0,Band.LastCTime,Angle,TotalBeats)
+    Batch.apply()
+    Band.LastCTime += TotalBeats
+
+def EnglishCounter(Band):
+    """
+    Perform an english counter
+
+    Input:
+    Band: BandCls object
+    Time: start time of the english counter
+    SameStart (optional = False): bool, specifies if the path before this bend end
+    at the same place or not.
+    """
+    Radius = 0.25 * Band.Sep[1]
+    Batch = BatchCls(Band)
+    BendTime = (Radius * math.pi) / Batch.Stride
+    Batch.leadIn()
+    Batch.bend(Radius,Band.LastCTime,180,BendTime)
+    Batch.apply()
+    for Player in Band.BandList: #Switch left-right
+        Player.Column = Band.Columns - Player.Column - 1
+    Band.StartEqual = True #All players have now been defined up to the same position
+    Band.LastCTime += BendTime.tolist()[-1]
+
+
+def AmericanCounter(Band, TotalBeats=16, SameStart = False):
+    """
+    Perform an american counter
+
+    Input:
+    Band: BandCls object
+    Time: start time of the counter
+    TotalBeats (optional = 16): number of beats of the movement
+    SameStart (optional = False): bool, specifies if the path before this bend end
+    at the same place or not.
+    """
+    Centre = math.ceil(Band.Columns/2) - 1
+    Batch = BatchCls(Band)
+    Batch.leadIn()
+    Inner = Batch.Column <= Centre
+    Angle = np.where(Inner, 180, -180)
+    Radius = np.abs(Batch.Column - Centre) * 2 + np.where(Inner, 0.5, -0.5)
+    Radius *= Band.Sep[1] / 2
+
+    Batch.bend(Radius,Band.LastCTime,Angle,TotalBeats)
+    Batch.apply()
+    Band.StartEqual = True #All players have now been defined up to the same position
+    Band.LastCTime += TotalBeats
+
+def QuickMarchReturn(Band):
+    """
+    Walk in a straight line, with different distance depending on the row
+    This returns the band to its original distribution, and resets StartEqual.
+    This is for example needed to make a turn on the spot, after a bend command has been given.
+
+    Input:
+    Band: the BandCls object
+    """
+    if not Band.StartEqual: #If False, we do not need this command
+        return
+    Batch = BatchCls(Band)
+    WalkTime = (Band.Rows - Batch.Row - 1) * Band.Sep[0] / Batch.Stride
+    Batch.straight(WalkTime)
+    Batch.apply()
+
+    Band.LastCTime += max([0] + WalkTime.tolist())
+    Band.StartEqual = False #Band restored to start definition
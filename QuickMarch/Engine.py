@@ -0,0 +1,1053 @@
+import numpy as np
+import math
+import bisect
+import weakref
+from .Render import symbolVertices, symbolRadius, visiblePlayers, lineMargin, loadPyplot
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Geometry and timing engine: players, paths, path segments and the band.
+#This module does not load matplotlib (see BandCls.plot).
+
+def sind(angle):
+    """
+    Returns the sine of the value that is supplied in degrees
+    """
+    return math.sin(angle/180 * math.pi)
+    
+def cosd(angle):
+    """
+    Returns the cosine of the value that is supplied in degrees
+    """
+    return math.cos(angle/180 * math.pi) 
+
+def rotMatrix(angle):
+    """
+    Returns a 2x2 rotation matrix for the supplied "angle"
+    """
+    return [[cosd(angle),-sind(angle)],[sind(angle),cosd(angle)]]
+
+def dot(a,b):
+    """
+    Performs a dot product between a 2x2 matrix and a length 2 vector
+    a: list of lists (2x2)
+    b: list (length 2)
+    """
+    elem1 = a[0][0] * b[0] + a[0][1] * b[1]
+    elem2 = a[1][0] * b[0] + a[1][1] * b[1]
+    return [elem1, elem2]
+
+def vecSum(a,b):
+    """
+    Sums two length two vectors (i.e. lists)
+    """
+    return [a[0] + b[0], a[1] + b[1]]
+
+
+#AFter this follow the Player and Band class definitions. The goals of the software is to define the
+#position and angle of a player at any given time. We do this by recalculating a given time-point to
+#a distance that has been walked from t=0. Every Player has a series of paths which define the
+#position and orientation of the player at a certain distance from the start. Moreover, there are
+#"Commands" which hold speed variation commands given at specific time points. When the position of
+#a Player is requested, the Players class searches for the right path definition in which the given
+#"Distance" falls, inputs this Distance to that path function, and returns the position and angles.
+ 
+class PlayerCls:
+    """
+    The player class. This holds the row and column position of a player, 
+    as well as the step size (i.e. stride). Additional input is the start position
+    ([x,y]) and start angle.
+
+    Inputs:
+    startPos: [x,y], start position
+    startAngle: float, starting angle of the player
+    Stride: float, default stride length (move speed)
+    Row: int, row number
+    Column: Int, column number
+    Band (optional = None): BandCls object this player belongs to. The band is notified
+    when paths or commands are added, such that compiled engines are rebuilt.
+    """
+    def __init__(self,startPos,startAngle, Stride, Row, Column, Band = None):
+        self.Engine = None #EngineCls object that holds the state, if attached
+        self.Index = None #Index of the player in the engine arrays
+        self.Pos = startPos
+        self.Distance = 0
+        self.Angle = startAngle
+        self.StartStride = Stride
+        self.Row = Row
+        self.Column = Column
+        self.Band = Band
+        self.Version = 0 #Incremented on every change of Path or Commands
+        #Each path is a segment (StraightCls, ArcCls or RotateCls). The first one is the
+        #zero length start position.
+        self.Path = [StraightCls(self.Pos,self.Angle,0)]
+        self.CumDist = [0] #The cumulative distance (i.e. the distance at the end of each path)
+        self.Cursor = 0 #Index of the path found by the last call of findPath
+        self.TimeCursor = 0 #Index of the timeline part found by the last call of getDist
+        self.Commands = [] #Holds the commands. Each command is a tuple (time, stridelength), shared within the band
+        self.Timeline = None #Compiled TimelineCls of the commands
+        #Symbol definition in polar coordinates [r,angle]
+        self.Symbol = [[0, 0], [0.3, 135], [0.4, 0], [0.3,-135]]
+        self.Colour = 'b' #Symbol colour
+
+    #When an engine is attached, Pos, Angle and Distance are views on the engine arrays
+    @property
+    def Pos(self):
+        if self.Engine is None:
+            return self._Pos
+        return self.Engine.Pos[self.Index]
+
+    @Pos.setter
+    def Pos(self,Value):
+        if self.Engine is None:
+            self._Pos = Value
+        else:
+            self.Engine.Pos[self.Index] = Value
+
+    @property
+    def Angle(self):
+        if self.Engine is None:
+            return self._Angle
+        return self.Engine.Angle[self.Index]
+
+    @Angle.setter
+    def Angle(self,Value):
+        if self.Engine is None:
+            self._Angle = Value
+        else:
+            self.Engine.Angle[self.Index] = Value
+
+    @property
+    def Distance(self):
+        if self.Engine is None:
+            return self._Distance
+        return self.Engine.Distance[self.Index]
+
+    @Distance.setter
+    def Distance(self,Value):
+        if self.Engine is None:
+            self._Distance = Value
+        else:
+            self.Engine.Distance[self.Index] = Value
+
+    def changed(self):
+        """
+        Mark the Path or Commands of this player as changed.
+        """
+        self.Version += 1
+        self.Timeline = None
+        if self.Band is not None:
+            self.Band.Version += 1
+
+    def addPath(self,Segment):
+        """
+        Append a path to the player.
+
+        Inputs:
+        Segment: StraightCls, ArcCls or RotateCls object
+        """
+        self.Path.append(Segment)
+        self.CumDist.append(self.CumDist[-1] + Segment.Length)
+        self.changed()
+
+    def addCommand(self,Time,Stride):
+        """
+        Append a stride change command to the player.
+
+        Inputs:
+        Time: time at which the stride changes
+        Stride: the new stride length
+        """
+        Command = (Time,Stride)
+        if self.Band is not None: #Players with the same command share it
+            Command = self.Band.SharedCommands.setdefault(Command, Command)
+        self.Commands.append(Command)
+        self.changed()
+
+    def setDist(self,Dist):
+        #Calc the new position
+        Index = self.findPath(Dist)
+        if Index == 0: #Before the first path: stand at the start
+            self.Pos = list(self.Path[0].EndPos)
+            self.Angle = self.Path[0].EndAngle
+        elif Index < len(self.CumDist):
+            EffDist = Dist - self.CumDist[Index - 1] #Get start offset of current path
+            self.Pos = self.Path[Index].getPos(EffDist)
+            self.Angle = self.Path[Index].getAngle(EffDist)
+        else: #Past the last path: stand at its end
+            self.Pos = list(self.Path[-1].EndPos)
+            self.Angle = self.Path[-1].EndAngle
+        self.Distance = Dist  
+
+    def findPath(self,Dist):
+        """
+        Returns the index of the path in which "Dist" falls, i.e. the first
+        path that ends beyond "Dist". Returns len(CumDist) if "Dist" is past
+        the last path.
+        The search resumes from the path found in the previous call (the cursor),
+        so moving forward in time costs O(1) per call, independent of the
+        number of paths. Other jumps use a binary search.
+        """
+        CumDist = self.CumDist
+        Index = min(self.Cursor, len(CumDist))
+        if Index > 0 and CumDist[Index - 1] > Dist: #Moved backwards
+            Index = bisect.bisect_right(CumDist, Dist, 0, Index)
+        elif Index < len(CumDist) and CumDist[Index] <= Dist: #Moved forward beyond current path
+            if Index + 1 < len(CumDist) and CumDist[Index + 1] > Dist: #Next path
+                Index += 1
+            else:
+                Index = bisect.bisect_right(CumDist, Dist, Index + 1)
+        self.Cursor = Index
+        return Index
+
+    def getTimeline(self):
+        """
+        Returns the compiled TimelineCls of the commands of this player.
+        It is recompiled when commands have been added.
+        """
+        if self.Timeline is None or self.Timeline.Count != len(self.Commands):
+            if self.Band is None:
+                self.Timeline = TimelineCls(self.StartStride,self.Commands)
+            else:
+                self.Timeline = self.Band.getTimeline(self.StartStride,self.Commands)
+        return self.Timeline
+
+    def getDist(self,Time):
+        #Get the player distance for a given time
+        Timeline = self.getTimeline()
+        self.TimeCursor = Timeline.getIndex(Time)
+        return Timeline.getDist(Time,self.TimeCursor)
+
+    def advance(self,Time):
+        """
+        Set the time of the player. While "Time" is on the same part of the timeline
+        as the previous time (i.e. the stride did not change), the distance follows
+        directly from that part, and the cursors of the timeline and path
+        (see findPath) are not searched again.
+        """
+        Timeline = self.Timeline
+        if Timeline is None or Timeline.Count != len(self.Commands) or not Timeline.contains(self.TimeCursor,Time):
+            self.setDist(self.getDist(Time))
+        else:
+            self.setDist(Timeline.getDist(Time,self.TimeCursor))
+
+    def getTime(self,Dist):
+        """
+        Returns the first time at which the player has walked distance "Dist"
+        """
+        return self.getTimeline().getTime(Dist)
+
+    def getPathTimes(self):
+        """
+        Returns a list with the time at which the player reaches the end of
+        each path (i.e. each entry of CumDist)
+        """
+        Timeline = self.getTimeline()
+        return [Timeline.getTime(Dist) for Dist in self.CumDist]
+
+
+class TimelineCls:
+    """
+    Compiled time to distance relation of a player. The commands are sorted
+    on time, and converted to a piecewise linear timeline: a list of
+    breakpoints with the time, the distance walked at that time (prefix sum)
+    and the stride from that time on. Any time or distance is then resolved
+    with a binary search.
+
+    Inputs:
+    StartStride: stride at t=0
+    Commands: list of (time, stridelength) commands
+    """
+    def __init__(self,StartStride,Commands):
+        self.Count = len(Commands) #Number of commands this timeline was compiled from
+        self.Times = [0]
+        self.Dists = [0]
+        self.Strides = [StartStride]
+        for Command in sorted(Commands, key = lambda x: x[0]): #Stable, so equal times keep their order
+            self.Dists.append(self.Dists[-1] + (Command[0] - self.Times[-1]) * self.Strides[-1])
+            self.Times.append(Command[0])
+            self.Strides.append(Command[1])
+
+    def getIndex(self,Time):
+        """
+        Returns the index of the breakpoint that holds at time "Time"
+        """
+        return max(bisect.bisect_right(self.Times,Time) - 1, 0)
+
+    def contains(self,Index,Time):
+        """
+        Returns True if breakpoint "Index" holds at time "Time" (see getIndex)
+        """
+        Times = self.Times
+        return (Index == 0 or Times[Index] <= Time) and (Index + 1 == len(Times) or Time < Times[Index + 1])
+
+    def getDist(self,Time,Index = None):
+        """
+        Returns the distance walked at time "Time". "Index" (optional) is the
+        breakpoint that holds at that time, if it is already known.
+        """
+        if Index is None:
+            Index = self.getIndex(Time)
+        return self.Dists[Index] + (Time - self.Times[Index]) * self.Strides[Index]
+
+    def getTime(self,Dist):
+        """
+        Returns the first time at which distance "Dist" is reached. This
+        assumes strides are never negative. Returns math.inf if the distance
+        is never reached.
+        """
+        Index = max(bisect.bisect_left(self.Dists,Dist) - 1, 0) #Last breakpoint before Dist
+        if self.Dists[Index] >= Dist: #Dist at or before the first breakpoint
+            if self.Dists[Index] == Dist or self.Strides[Index] <= 0:
+                return self.Times[Index]
+        elif self.Strides[Index] <= 0: #Standing still after the last breakpoint
+            return math.inf
+        return self.Times[Index] + (Dist - self.Dists[Index]) / self.Strides[Index]
+
+
+#Path segments. Each path of a player is described by a segment record, which holds
+#the precomputed parameters of its shape. All segments share the same parameter set
+#(see SegmentCls.getParams), such that a list of segments can be packed into arrays
+#by SegmentTableCls and evaluated in a single batched call:
+#   angle = Angle + Sweep * Dist / Length
+#   pos = [X + DX * Dist + Radius * cosd(Phase + Sweep * Dist / Length),
+#          Y + DY * Dist + Radius * sind(Phase + Sweep * Dist / Length)]
+#
+#The shape of a segment (angles, radius, length) does not depend on where it starts,
+#and is the same for many players (e.g. all players of a column in a bend). It is
+#held by a ShapeCls, which is shared by all segments with the same shape (see getShape).
+#A segment itself only holds its shape and its position.
+
+STRAIGHT = 0
+ARC = 1
+ROTATE = 2
+
+TurnDist = 1e-6 #Nominal distance per radian that is walked when rotating in place
+
+_Shapes = weakref.WeakValueDictionary() #All shapes in use, by key
+
+class ShapeCls:
+    """
+    Position independent part of a segment, shared between segments.
+
+    Attributes:
+    StartAngle: angle at the start of the segment
+    Length: distance walked over the segment
+    Sweep: change of the angle over the segment
+    EndAngle: angle at the end of the segment
+    Direction: unit vector of a straight segment
+    Radius, Phase: radius of an arc, and angle of its start position as seen from the centre
+    Offset: [x,y] offset of the centre of an arc from its start position (y is subtracted)
+    EndOffset: [x,y] offset of the end position of an arc from its centre
+    """
+    __slots__ = ('StartAngle', 'Length', 'Sweep', 'EndAngle', 'Direction', 'Radius', 'Phase',
+                 'Offset', 'EndOffset', '__weakref__')
+
+    def __init__(self,StartAngle,Length,Sweep = 0.0):
+        self.StartAngle = StartAngle
+        self.Length = Length
+        self.Sweep = Sweep
+        self.EndAngle = StartAngle
+        self.Direction = (0.0, 0.0)
+        self.Radius = 0.0
+        self.Phase = 0.0
+        self.Offset = (0.0, 0.0)
+        self.EndOffset = (0.0, 0.0)
+
+    def getAngle(self,Dist):
+        return self.StartAngle + self.Sweep * Dist / self.Length
+
+def getShape(Key,Create):
+    """
+    Returns the shape with "Key", if it is in use. Otherwise, a new shape is
+    made by calling "Create".
+    """
+    Shape = _Shapes.get(Key)
+    if Shape is None:
+        Shape = Create()
+        _Shapes[Key] = Shape
+    return Shape
+
+
+class SegmentCls:
+    """
+    Base class of the path segments.
+
+    Attributes:
+    Kind: STRAIGHT, ARC or ROTATE
+    Shape: the (shared) ShapeCls of the segment
+    Length: distance walked over the segment
+    StartAngle: angle at the start of the segment
+    EndPos: [x,y] position at the end of the segment
+    EndAngle: angle at the end of the segment
+
+    For backwards compatibility, a segment can be indexed as the old path lists:
+    [posfunction, anglefunction, pathdist, endpos, endangle]
+    """
+    __slots__ = ('Shape',)
+    Kind = None
+
+    def __getitem__(self,Index):
+        return [self.getPos,self.getAngle,self.Length,self.EndPos,self.EndAngle][Index]
+
+    def __len__(self):
+        return 5
+
+    @property
+    def Length(self):
+        return self.Shape.Length
+
+    @property
+    def StartAngle(self):
+        return self.Shape.StartAngle
+
+    @property
+    def EndAngle(self):
+        return self.Shape.EndAngle
+
+    @property
+    def Sweep(self):
+        return self.Shape.Sweep
+
+    @property
+    def EndPos(self):
+        return self.getPos(self.Length)
+
+    def getAngle(self,Dist):
+        return self.Shape.getAngle(Dist)
+
+    def getParams(self):
+        """
+        Returns the parameters of the segment, as used by SegmentTableCls:
+        [Kind, X, Y, Angle, DX, DY, Radius, Phase, Sweep, Length]
+        Abstract: implemented by each kind of segment.
+        """
+        raise NotImplementedError
+
+
+def _straightShape(StartAngle,Length):
+    Shape = ShapeCls(StartAngle,Length)
+    Shape.Direction = (cosd(StartAngle),sind(StartAngle)) #Unit vector
+    return Shape
+
+def getStraightShape(StartAngle,Length):
+    return getShape((STRAIGHT, StartAngle, Length), lambda: _straightShape(StartAngle,Length))
+
+class StraightCls(SegmentCls):
+    """
+    Straight path segment.
+
+    Inputs:
+    StartPos: [x,y] (start position of the player before the path)
+    StartAngle: float (start angle of the player before the path)
+    Length: length of the path
+    """
+    __slots__ = ('Origin',)
+    Kind = STRAIGHT
+
+    def __init__(self,StartPos,StartAngle,Length):
+        self.Shape = getStraightShape(StartAngle,Length)
+        self.Origin = (StartPos[0],StartPos[1])
+
+    @property
+    def Direction(self):
+        return self.Shape.Direction
+
+    def getPos(self,Dist):
+        Direction = self.Shape.Direction
+        return [self.Origin[0] + Direction[0] * Dist, self.Origin[1] + Direction[1] * Dist]
+
+    def getAngle(self,Dist):
+        return self.Shape.StartAngle
+
+    def getParams(self):
+        Shape = self.Shape
+        return [STRAIGHT, self.Origin[0], self.Origin[1], Shape.StartAngle,
+                Shape.Direction[0], Shape.Direction[1], 0.0, 0.0, 0.0, Shape.Length]
+
+
+def _arcShape(StartAngle,Radius,Angle):
+    sign = math.copysign(1,Angle)
+    Shape = ShapeCls(StartAngle, math.fabs(Angle) / 180 * math.pi * Radius, -Angle)
+    Shape.Radius = Radius
+    Shape.Offset = (sign * Radius * sind(StartAngle), sign * Radius * cosd(StartAngle))
+    Shape.Phase = StartAngle + sign * 90 #Angle of the start position as seen from the centre
+    #Same expression as getPos at Dist = Length (Sweep * Length / Length is not always
+    #exactly Sweep), such that EndPos is bitwise equal to getPos(Length)
+    EndPhase = Shape.Phase + Shape.Sweep * Shape.Length / Shape.Length
+    Shape.EndOffset = (Radius * cosd(EndPhase), Radius * sind(EndPhase))
+    Shape.EndAngle = Shape.getAngle(Shape.Length)
+    return Shape
+
+def getArcShape(StartAngle,Radius,Angle):
+    return getShape((ARC, StartAngle, Radius, Angle, math.copysign(1,Angle)), lambda: _arcShape(StartAngle,Radius,Angle))
+
+class ArcCls(SegmentCls):
+    """
+    Corner (circular arc) path segment.
+
+    Inputs:
+    StartPos: [x,y] (start position of the player before the path)
+    StartAngle: float (start angle of the player before the path)
+    Radius: Radius of the corner that is to be made (> 0)
+    Angle: Angle of the corner that is to be made. Positive values are corners to the right.
+    """
+    __slots__ = ('Centre',)
+    Kind = ARC
+
+    def __init__(self,StartPos,StartAngle,Radius,Angle):
+        self.Shape = getArcShape(StartAngle,Radius,Angle)
+        Offset = self.Shape.Offset
+        self.Centre = (StartPos[0] + Offset[0], StartPos[1] - Offset[1])
+
+    @property
+    def Radius(self):
+        return self.Shape.Radius
+
+    @property
+    def Phase(self):
+        return self.Shape.Phase
+
+    @property
+    def EndPos(self):
+        EndOffset = self.Shape.EndOffset
+        return [self.Centre[0] + EndOffset[0], self.Centre[1] + EndOffset[1]]
+
+    def getPos(self,Dist):
+        Shape = self.Shape
+        Phase = Shape.Phase + Shape.Sweep * Dist / Shape.Length
+        return [self.Centre[0] + Shape.Radius * cosd(Phase), self.Centre[1] + Shape.Radius * sind(Phase)]
+
+    def getParams(self):
+        Shape = self.Shape
+        return [ARC, self.Centre[0], self.Centre[1], Shape.StartAngle,
+                0.0, 0.0, Shape.Radius, Shape.Phase, Shape.Sweep, Shape.Length]
+
+
+def _rotateShape(StartAngle,Angle):
+    Shape = ShapeCls(StartAngle, math.fabs(Angle) / 180 * math.pi * TurnDist, -Angle)
+    Shape.EndAngle = Shape.getAngle(Shape.Length)
+    return Shape
+
+def getRotateShape(StartAngle,Angle):
+    return getShape((ROTATE, StartAngle, Angle), lambda: _rotateShape(StartAngle,Angle))
+
+class RotateCls(SegmentCls):
+    """
+    Rotation in place. The player does not move, but a (very small) nominal
+    distance is walked to define the progress of the rotation.
+
+    Inputs:
+    StartPos: [x,y] (position of the player)
+    StartAngle: float (start angle of the player before the rotation)
+    Angle: Angle of the rotation. Positive values are rotations to the right.
+    """
+    __slots__ = ('Origin',)
+    Kind = ROTATE
+
+    def __init__(self,StartPos,StartAngle,Angle):
+        self.Shape = getRotateShape(StartAngle,Angle)
+        self.Origin = (StartPos[0],StartPos[1])
+
+    @property
+    def EndPos(self):
+        return list(self.Origin)
+
+    def getPos(self,Dist):
+        return list(self.Origin)
+
+    def getParams(self):
+        Shape = self.Shape
+        return [ROTATE, self.Origin[0], self.Origin[1], Shape.StartAngle,
+                0.0, 0.0, 0.0, 0.0, Shape.Sweep, Shape.Length]
+
+
+def makeSegments(Class,Shapes,X,Y):
+    """
+    Returns a list of segments of "Class" (StraightCls, ArcCls or RotateCls) with
+    the shapes in "Shapes", at the positions "X" and "Y" (lists with the origin, or
+    the centre of an arc). This makes many segments at once, of which the shapes
+    and positions have already been computed.
+    """
+    New = Class.__new__
+    Segments = [New(Class) for Shape in Shapes]
+    if Class is ArcCls:
+        for Segment, Shape, x, y in zip(Segments, Shapes, X, Y):
+            Segment.Shape = Shape
+            Segment.Centre = (x, y)
+    else:
+        for Segment, Shape, x, y in zip(Segments, Shapes, X, Y):
+            Segment.Shape = Shape
+            Segment.Origin = (x, y)
+    return Segments
+
+
+class SegmentTableCls:
+    """
+    Struct-of-arrays representation of a list of segments, for batched evaluation.
+
+    Inputs:
+    Segments: list of segments (StraightCls, ArcCls or RotateCls objects)
+    Params (optional = None): (segments x 10) array with the parameters of the
+    segments (see SegmentCls.getParams), used instead of "Segments"
+    """
+    def __init__(self,Segments,Params = None):
+        if Params is None:
+            Params = np.array([Segment.getParams() for Segment in Segments], dtype = float).reshape(-1,10)
+        self.Params = Params
+        self.Kind = Params[:,0].astype(int)
+        self.X = Params[:,1]
+        self.Y = Params[:,2]
+        self.Angle = Params[:,3]
+        self.DX = Params[:,4]
+        self.DY = Params[:,5]
+        self.Radius = Params[:,6]
+        self.Phase = Params[:,7]
+        self.Sweep = Params[:,8]
+        self.Length = Params[:,9]
+
+    def getState(self,Index,Dist):
+        """
+        Returns the positions (n x 2) and angles of segments "Index" (array) at
+        distances "Dist" (array) from the start of these segments
+        """
+        return getSegmentState(self.Params[Index],Dist)
+
+
+def getSegmentState(Params,Dist):
+    """
+    Returns the positions (n x 2) and angles of the segments with parameters
+    "Params" (n x 10 array, see SegmentCls.getParams) at distances "Dist"
+    (array) from the start of these segments
+    """
+    Length = Params[:,9]
+    Fraction = np.divide(Dist, Length, out = np.zeros(len(Params)), where = Length > 0)
+    Turned = Params[:,8] * Fraction
+    Phase = np.radians(Params[:,7] + Turned)
+    Radius = Params[:,6]
+    Pos = np.empty((len(Params), 2))
+    Pos[:,0] = Params[:,1] + Params[:,4] * Dist + Radius * np.cos(Phase)
+    Pos[:,1] = Params[:,2] + Params[:,5] * Dist + Radius * np.sin(Phase)
+    return Pos, Params[:,3] + Turned
+
+
+class BandCls:
+    def __init__(self,Size,Sep = [1.6,1.6],Stride = 0.8,Pos = [0,0],Angle = 0):
+        """
+        Band class object. Holds all the individual players, as well as the current
+        time.
+
+        Inputs:
+        Size: size of the band, in [Rows,Columns]
+        Sep (optional = [1.6,1.6]): distance between rows and columns [Row,Column]
+        Stride (optional = 0.8): stride length
+        Pos (optional [0,0]): start position of row 1, centre position [x,y]
+        Angle (optional = 0): start angle of all players
+
+
+        Routines:
+        setTime: Set the time of the band, calculating all new positions
+        and angles of all players.
+
+        useEngine: Attach (or detach) an array-backed EngineCls, which evaluates
+        all players in one batched call in setTime.
+
+        iterStates: Iterate over the band states of a time grid, without changing the band.
+
+        Plot: Makes a plot of the band, and saves to a file.
+        """
+        self.Rows = Size[0]
+        self.Columns = Size[1]
+        self.BandList = []
+        self.Sep = Sep 
+        self.Pos = Pos
+        self.Angle = Angle
+        self.Time = 0 #Time in beats since start
+        self.LastCTime = 0 #Time of last command/path definition
+        self.StartEqual = False #Bool that holds of the path of the players are defined to the same start
+        self.Version = 0 #Incremented when the path or commands of any player change
+        self.Engine = None #Attached EngineCls, if any
+        self.SharedCommands = {} #Stride commands of all players, such that equal commands are stored once
+        self.Timelines = weakref.WeakValueDictionary() #Compiled TimelineCls objects in use, by start stride and commands
+        self.Compiled = None #EngineCls used by iterStates, if not attached
+        self.PathEnds = None #Version, end positions and end angles of all players, as kept by the band commands
+        
+        for Row in range(self.Rows):
+            for Column in range(self.Columns):
+                Cpos = (Column + 1 - (self.Columns + 1) / 2) * self.Sep[1]
+                Rpos =  Row * self.Sep[0]
+                x = self.Pos[0] + sind(Angle) * Cpos - cosd(Angle) * Rpos
+                y = self.Pos[1] - cosd(Angle) * Cpos - sind(Angle) * Rpos
+                self.BandList.append(PlayerCls([x,y],self.Angle,Stride,Row,Column,self))
+
+    def useEngine(self,Use = True):
+        """
+        Attach an array-backed engine to the band. While attached, setTime
+        evaluates all players in a single batched call, and the Pos, Angle and
+        Distance attributes of the players are views on the engine arrays.
+        The engine is recompiled automatically when paths or commands are added.
+
+        Input:
+        Use (optional = True): bool, attach (True) or detach (False) the engine
+        """
+        if Use:
+            Engine = EngineCls(self)
+            for Index, Player in enumerate(self.BandList):
+                Player.Engine = Engine
+                Player.Index = Index
+            self.Engine = Engine
+        elif self.Engine is not None:
+            for Player in self.BandList:
+                Pos = [float(Player.Pos[0]), float(Player.Pos[1])]
+                Angle = float(Player.Angle)
+                Distance = float(Player.Distance)
+                Player.Engine = None
+                Player.Index = None
+                Player.Pos = Pos
+                Player.Angle = Angle
+                Player.Distance = Distance
+            self.Engine = None
+
+    def __getstate__(self):
+        State = self.__dict__.copy()
+        del State['Timelines'] #Weak references can not be pickled, it is rebuilt on use
+        State['Compiled'] = None
+        State['PathEnds'] = None
+        return State
+
+    def __setstate__(self,State):
+        self.__dict__.update(State)
+        self.Timelines = weakref.WeakValueDictionary()
+
+    def getTimeline(self,StartStride,Commands):
+        """
+        Returns the compiled TimelineCls of a start stride and list of commands.
+        Players with the same commands (e.g. all players of a column) share it.
+        """
+        Key = (StartStride, tuple(Commands))
+        try:
+            Timeline = self.Timelines.get(Key)
+        except TypeError: #Commands that are not hashable (e.g. lists appended directly)
+            return TimelineCls(StartStride,Commands)
+        if Timeline is None:
+            Timeline = TimelineCls(StartStride,Commands)
+            self.Timelines[Key] = Timeline
+        return Timeline
+
+    def setTime(self,NewTime):
+        """
+        Set the time of the band. This updates all player positions and orientations
+
+        Input:
+        NewTime: the new time of the band
+        """
+        if self.Engine is not None:
+            if self.Engine.Version != self.Version: #Paths changed since compilation
+                self.useEngine()
+            self.Engine.setTime(NewTime)
+        else:
+            for Player in self.BandList:
+                Player.advance(NewTime)
+            
+        self.Time = NewTime #Update the band time to the new value
+        
+    def getEngine(self):
+        """
+        Returns an EngineCls of the current paths and commands: the attached
+        engine if it is up to date, or else a compiled engine that is kept (but
+        not attached) until the paths or commands change.
+        """
+        if self.Engine is not None and self.Engine.Version == self.Version:
+            return self.Engine
+        if self.Compiled is None or self.Compiled.Version != self.Version:
+            self.Compiled = EngineCls(self)
+        return self.Compiled
+
+    def iterTimes(self,Times):
+        """
+        Generator of the band states at "Times" (iterable). For each time, it yields
+        (time, positions, angles), with the (players x 2) positions and the angles
+        as read-only arrays. States are evaluated one at a time when requested,
+        and the band itself (its time and the player positions) is not changed.
+        """
+        Engine = self.getEngine()
+        for Time in Times:
+            Dist, Pos, Angle = Engine.evaluate(Time)
+            Pos.flags.writeable = False
+            Angle.flags.writeable = False
+            yield Time, Pos, Angle
+
+    def iterStates(self,dt,Steps,Start = 0):
+        """
+        Generator of the band states at times Start + n * dt (n = 0 ... Steps - 1).
+        See iterTimes.
+
+        Inputs:
+        dt: time in beats between each state
+        Steps: number of states
+        Start (optional = 0): time of the first state
+        """
+        return self.iterTimes(Start + Step * dt for Step in range(int(Steps)))
+
+    def getState(self):
+        """
+        Returns the positions (players x 2 array) and angles (array) of all players
+        """
+        if self.Engine is not None:
+            return self.Engine.Pos.copy(), self.Engine.Angle.copy()
+        Pos = np.array([[Player.Pos[0], Player.Pos[1]] for Player in self.BandList], dtype = float).reshape(-1,2)
+        Angle = np.array([Player.Angle for Player in self.BandList], dtype = float)
+        return Pos, Angle
+
+    def getSymbols(self):
+        """
+        Returns the symbols of all players as a (players x vertices x 2) array, with
+        [r, angle] polar coordinates. Shorter symbols are padded by repeating their last vertex.
+        """
+        Vertices = max([len(Player.Symbol) for Player in self.BandList] + [1])
+        Symbols = np.zeros((len(self.BandList), Vertices, 2))
+        for Index, Player in enumerate(self.BandList):
+            Symbol = list(Player.Symbol)
+            Symbols[Index] = Symbol + [Symbol[-1]] * (Vertices - len(Symbol))
+        return Symbols
+
+    def getColours(self):
+        """
+        Returns a list with the colours of all players
+        """
+        return [Player.Colour for Player in self.BandList]
+
+    def plot(self,Path,Fig = None,ax = None, limits = [[-20,20],[-60,65]], dpi = 150):
+        """
+        Make a plot of the current band
+
+        Inputs: 
+        Path: string, with output location path including file extension (i.e. .png).
+        If None, the figure is only drawn on its canvas at "dpi" (see canvasRGB).
+        Fig (optional): figure handle
+        ax (optional): axis handle
+        limits (optional): plot limits as list of lists: [[xmin, xmax],[ymin, ymax]]
+        dpi (optional = 150): resolution of output picture
+        """
+        plt = loadPyplot()
+        from matplotlib.collections import PolyCollection
+        if Fig == None:
+            Fig = plt.figure()
+            ax = Fig.add_subplot(111)
+        else:
+            ax.clear()
+        Pos, Angle = self.getState()
+        Symbols = self.getSymbols()
+        Shown = visiblePlayers(Pos, symbolRadius(Symbols) + lineMargin(ax, limits), limits) #Leave out players outside the limits
+        Verts = symbolVertices(Symbols[Shown], Pos[Shown], Angle[Shown])
+        Colours = self.getColours()
+        Colours = [Colours[Index] for Index in Shown]
+        ax.add_collection(PolyCollection(Verts, facecolors = Colours, edgecolors = Colours, joinstyle = 'miter'))
+        ax.axis('equal')
+        ax.axis('off')
+        ax.set_xlim(limits[0])
+        ax.set_ylim(limits[1])
+        if Path is None:
+            Fig.set_dpi(dpi)
+            Fig.canvas.draw()
+        else:
+            Fig.canvas.draw()
+            Fig.savefig(Path,dpi=dpi)
+        return Fig, ax
+
+class EngineCls:
+    """
+    Array-backed state engine for a BandCls. The paths and commands of all
+    players are compiled into flat arrays (struct-of-arrays), such that the
+    distances, positions and angles of the whole band are evaluated in a
+    few batched NumPy calls, instead of a Python loop over all players.
+
+    The engine is a snapshot of the band at the moment of creation. Use
+    BandCls.useEngine to attach it, which also recompiles it when new paths
+    or commands are added to the band.
+
+    Inputs:
+    Band: BandCls object (or None if "Arrays" is given)
+    Arrays (optional = None): dict with the arrays of a compiled engine (see
+    getArrays). The engine is restored from these, instead of compiled.
+
+    Attributes:
+    Pos: (players x 2) array with the current positions
+    Angle: (players) array with the current angles
+    Distance: (players) array with the current distances
+    """
+    Fields = ['Times', 'Dists', 'Strides', 'TimeOffsets', 'TimeKeys', 'TimeRange',
+              'Lo', 'Ends', 'SegOffsets', 'SegRange', 'Pos', 'Angle', 'Distance']
+
+    def __init__(self,Band,Arrays = None):
+        self.Cache = None #Timeline part and segment of each player at the last evaluated time
+        if Arrays is not None:
+            for Field in self.Fields:
+                setattr(self, Field, np.array(Arrays[Field]))
+            self.Segments = SegmentTableCls(None, np.array(Arrays['Segments'], dtype = float).reshape(-1,10))
+            self.Size = len(self.Pos)
+            self.Version = None
+            return
+        self.Version = Band.Version
+        Players = Band.BandList
+        self.Size = len(Players)
+
+        #Time to distance timeline. Per player, the breakpoints of its TimelineCls
+        Times = []
+        TimeKeys = [] #Times shifted by a per-player offset, such that all players share one sorted array
+        Dists = []
+        Strides = []
+        TimeOffsets = []
+        TimeRange = []
+        Offset = 0.0
+        for Player in Players:
+            Timeline = Player.getTimeline()
+            PlayerTimes = Timeline.Times
+            PlayerDists = Timeline.Dists
+            PlayerStrides = Timeline.Strides
+            TimeRange.append([len(Times), len(Times) + len(PlayerTimes) - 1])
+            TimeOffsets.append(Offset)
+            Times += PlayerTimes
+            TimeKeys += [x + Offset for x in PlayerTimes]
+            Dists += PlayerDists
+            Strides += PlayerStrides
+            Offset += max(PlayerTimes) + 1.0
+        self.Times = np.array(Times, dtype = float)
+        self.Dists = np.array(Dists, dtype = float)
+        self.Strides = np.array(Strides, dtype = float)
+        self.TimeOffsets = np.array(TimeOffsets, dtype = float)
+        self.TimeKeys = np.array(TimeKeys, dtype = float)
+        self.TimeRange = np.array(TimeRange, dtype = int).reshape(-1,2)
+
+        #Path segments. Per player, all entries of Player.Path (including the
+        #start position at index 0), packed in one SegmentTableCls.
+        Segments = []
+        Lo = [] #Cumulative distance at the start of the path
+        Ends = [] #Cumulative distance at the end of the path, shifted by a per-player offset
+        SegOffsets = []
+        SegRange = []
+        Offset = 0.0
+        for Player in Players:
+            SegRange.append([len(Segments), len(Segments) + len(Player.Path) - 1])
+            SegOffsets.append(Offset)
+            Segments += Player.Path
+            Lo += [0.0] + Player.CumDist[:-1]
+            Ends += [x + Offset for x in Player.CumDist]
+            Offset += Player.CumDist[-1] + 1.0
+        self.Segments = SegmentTableCls(Segments)
+        self.Lo = np.array(Lo, dtype = float)
+        self.Ends = np.array(Ends, dtype = float)
+        self.SegOffsets = np.array(SegOffsets, dtype = float)
+        self.SegRange = np.array(SegRange, dtype = int).reshape(-1,2)
+
+        #Current state, initialised from the players
+        self.Pos = np.array([[Player.Pos[0], Player.Pos[1]] for Player in Players], dtype = float).reshape(-1,2)
+        self.Angle = np.array([Player.Angle for Player in Players], dtype = float)
+        self.Distance = np.array([Player.Distance for Player in Players], dtype = float)
+
+    def getArrays(self):
+        """
+        Returns a dict with all arrays of the engine, from which it can be restored
+        """
+        Arrays = dict((Field, getattr(self, Field)) for Field in self.Fields)
+        Arrays['Segments'] = self.Segments.Params
+        return Arrays
+
+    def getDist(self,Time):
+        """
+        Returns an array with the distance of all players at time "Time"
+        """
+        Index = np.searchsorted(self.TimeKeys, Time + self.TimeOffsets, side = 'right') - 1
+        Index = np.clip(Index, self.TimeRange[:,0], self.TimeRange[:,1])
+        return self.Dists[Index] + (Time - self.Times[Index]) * self.Strides[Index]
+
+    def getState(self,Dist):
+        """
+        Returns the positions (players x 2) and angles of all players at the
+        distances "Dist" (array with one distance per player). Players that
+        are past their last path stand at the end of it.
+        """
+        Index = np.searchsorted(self.Ends, Dist + self.SegOffsets, side = 'right')
+        Index = np.clip(Index, self.SegRange[:,0], self.SegRange[:,1])
+        EffDist = np.clip(Dist - self.Lo[Index], 0, self.Segments.Length[Index])
+        return self.Segments.getState(Index, EffDist)
+
+    def evaluate(self,Time):
+        """
+        Returns the distances, positions (players x 2) and angles of all players at
+        time "Time". This gives the same result as getState(getDist(Time)), but
+        only the players whose key left the bounds of their cached part of the
+        timeline or segment since the previous evaluation are searched again.
+        The others continue on the same part and segment, which are kept in Cache.
+        The bounds are the same TimeKeys and Ends values that the search uses,
+        so this one vectorized check finds every stale player.
+        """
+        Cache = self.Cache
+        if Cache is None: #Nothing cached yet: all players fail the bounds checks
+            Size = self.Size
+            Cache = self.Cache = {'TimeIndex': np.zeros(Size, dtype = int),
+                                  'TimeLow': np.full(Size, np.inf), 'TimeHigh': np.full(Size, -np.inf),
+                                  'SegIndex': np.zeros(Size, dtype = int),
+                                  'SegLow': np.full(Size, np.inf), 'SegHigh': np.full(Size, -np.inf),
+                                  'Times': np.zeros(Size), 'Dists': np.zeros(Size), 'Strides': np.zeros(Size),
+                                  'Lo': np.zeros(Size), 'Params': np.zeros((Size, 10))}
+        #Part of the timeline
+        Key = Time + self.TimeOffsets
+        Stale = (Key < Cache['TimeLow']) | (Key >= Cache['TimeHigh'])
+        Players = np.flatnonzero(Stale)
+        if len(Players):
+            First = self.TimeRange[Players,0]
+            Last = self.TimeRange[Players,1]
+            Index = np.searchsorted(self.TimeKeys, Key[Players], side = 'right') - 1
+            Index = np.clip(Index, First, Last)
+            Cache['TimeIndex'][Players] = Index
+            Cache['TimeLow'][Players] = np.where(Index > First, self.TimeKeys[Index], -np.inf)
+            Cache['TimeHigh'][Players] = np.where(Index < Last, self.TimeKeys[np.minimum(Index + 1, Last)], np.inf)
+            Cache['Times'][Players] = self.Times[Index]
+            Cache['Dists'][Players] = self.Dists[Index]
+            Cache['Strides'][Players] = self.Strides[Index]
+        Dist = Cache['Dists'] + (Time - Cache['Times']) * Cache['Strides']
+        #Segment
+        Key = Dist + self.SegOffsets
+        Stale = (Key < Cache['SegLow']) | (Key >= Cache['SegHigh'])
+        Players = np.flatnonzero(Stale)
+        if len(Players):
+            First = self.SegRange[Players,0]
+            Last = self.SegRange[Players,1]
+            Index = np.searchsorted(self.Ends, Key[Players], side = 'right')
+            Index = np.clip(Index, First, Last)
+            Cache['SegIndex'][Players] = Index
+            Cache['SegLow'][Players] = np.where(Index > First, self.Ends[np.maximum(Index - 1, First)], -np.inf)
+            Cache['SegHigh'][Players] = np.where(Index < Last, self.Ends[Index], np.inf)
+            Cache['Lo'][Players] = self.Lo[Index]
+            Cache['Params'][Players] = self.Segments.Params[Index]
+        Params = Cache['Params']
+        EffDist = np.clip(Dist - Cache['Lo'], 0, Params[:,9])
+        Pos, Angle = getSegmentState(Params, EffDist)
+        return Dist, Pos, Angle
+
+    def setTime(self,Time):
+        """
+        Evaluate all players at time "Time", and store the result in the
+        Pos, Angle and Distance arrays (see evaluate).
+        """
+        Dist, Pos, Angle = self.evaluate(Time)
+        self.Pos[:] = Pos
+        self.Angle[:] = Angle
+        self.Distance[:] = Dist
+
@@ -0,0 +1,806 @@
+import numpy as np
+import os
+import shutil
+import multiprocessing
+import subprocess
+import threading
+import queue
+import time
+import cProfile
+import pstats
+import json
+import hashlib
+from .Render import getRenderer, fitLimits
+from .Trajectory import exportTrajectory, TrajectoryCls
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Output of frames: images, encoder streams, statistics and render workers.
+
+def makeOutput(Band,Folder,Steps,dt,PlotLimits = [[-20,20],[-60,65]], dpi = 150, workers = 1, Encoder = None,
+               Backend = 'matplotlib', Stats = None, Clean = False, Shard = None, Range = None):
+    """
+    Generate images of all required frames of the band animation
+
+    Rendering is incremental: every frame gets a key, which is a hash of the
+    band state and the render settings. The keys of the rendered frames are
+    stored in the output folder (see ManifestCls). Frames of which the key and
+    image on disk are up to date are not rendered again, such that only the
+    changed part of a show is rendered, and an interrupted run can be resumed.
+
+    The band states are taken from Band.iterStates, so the band itself is not changed.
+
+    A long show can be split over several processes or machines, that render
+    into the same (shared) folder: each renders a shard ("Shard" or "Range") of
+    the frames, with the same numbering as a complete run. Every frame is
+    evaluated directly at its own time. The shards log their frames to their own
+    file in the folder, and mergeOutput checks that all frames are present once
+    all shards are done.
+
+    Input:
+    Band: BandCls object, or a TrajectoryCls to render a sampled trajectory (in
+    that case "dt" must be a multiple of the sample time of the file)
+    Folder: output folder, will be created if required. Not used if
+    "Encoder" is given (can be None).
+    Steps: number of animation frames
+    dt: time in beats between each frame
+    PlotLimits (optional): plot limits as list of lists: [[xmin, xmax],[ymin, ymax]],
+    or 'auto' to fit the limits to the players in all frames (see fitLimits)
+    dpi (optional = 150): resolution of output picture
+    workers (optional = 1): number of processes that render frames in parallel.
+    Each worker gets a pickled copy of the band, and renders with its own figure.
+    When using more than 1 worker on a platform that spawns processes (Windows, macOS),
+    the calling script must be protected by 'if __name__ == "__main__":'.
+    Encoder (optional = None): encoder command (see EncoderCls and ffmpegCommand).
+    If given, no images are saved, but the raw RGB frames are streamed to the
+    stdin of this command.
+    Backend (optional = 'matplotlib'): rendering backend, a name in Renderers
+    ('matplotlib' or the faster 'raster') or a renderer class.
+    Stats (optional = None): StatsCls object, which records the duration of
+    each stage of every frame (and optionally profiles a range of frames)
+    Clean (optional = False): remove all files in the output folder first, and
+    render all frames. For a shard, only its own images and log are removed.
+    Shard (optional = None): [Index, Count], render only shard "Index" (0 ... Count - 1)
+    of "Count" equal shards of contiguous frames
+    Range (optional = None): [Start, Stop], render only frames Start ... Stop - 1
+    (frame n is saved as n+1.png), instead of a "Shard"
+    """
+    if int(Steps) < 1:
+        raise ValueError('"Steps" should be more than 0')
+    if int(workers) < 1:
+        raise ValueError('"workers" should be more than 0')
+
+    Steps = int(Steps)
+    getRenderer(Backend) #Check the backend
+    Sharded = Shard is not None or Range is not None
+    if Sharded:
+        if Encoder is not None:
+            raise ValueError('A shard can not be streamed to an encoder, use mergeOutput and encode the images')
+        Range = getShardRange(Steps, Shard, Range)
+    else:
+        Range = [0, Steps]
+    if isinstance(PlotLimits, str):
+        if PlotLimits != 'auto':
+            raise ValueError('"PlotLimits" should be limits or \'auto\'')
+        PlotLimits = fitLimits(Band, Steps, dt) #Of all frames, such that all shards use the same limits
+    Frames = list(range(Range[0], Range[1]))
+    Manifest = None
+    if Encoder is None:
+        if not os.path.exists(Folder):
+            try:
+                os.mkdir(Folder)
+            except FileExistsError: #Made by another shard
+                pass
+
+        if Clean and not Sharded: #Clear folder
+            filelist = [ f for f in os.listdir(Folder)]
+            for f in filelist:
+                os.remove(os.path.join(Folder, f))
+
+        Manifest = ManifestCls(Folder, Range if Sharded else None)
+        if Clean and Sharded:
+            Manifest.remove(Frames)
+        if not Sharded:
+            Manifest.prune(Steps)
+        Keys = dict(zip(Frames, getFrameKeys(Band, Steps, dt, PlotLimits, dpi, Backend, Frames)))
+        Frames = [Frame for Frame in Frames if not Manifest.isCurrent(Frame, Keys[Frame])]
+
+    if Encoder is not None:
+        Encoder = EncoderCls(Encoder)
+    if Stats is not None:
+        Stats.start()
+    workers = max(min(int(workers), len(Frames)), 1)
+    #Split the frames in contiguous chunks, a few per worker to balance the load.
+    #Streamed chunks are kept short, as their frames are returned in memory.
+    #The manifest is updated after each chunk.
+    NChunks = min(4 * workers, len(Frames))
+    if Encoder is not None or Manifest is not None:
+        NChunks = max(NChunks, len(Frames) // 16)
+    Chunks = [Frames[len(Frames) * n // NChunks:len(Frames) * (n + 1) // NChunks] for n in range(NChunks)]
+    try:
+        if workers == 1:
+            Sink = None if Encoder is None else Encoder.write
+            Renderer = None
+            Previous = {}
+            try:
+                for Chunk in Chunks:
+                    Renderer = renderFrames(Band, Folder, Chunk, dt, PlotLimits, dpi, Renderer = Renderer, Sink = Sink,
+                                            Backend = Backend, Stats = Stats, Previous = Previous)
+                    if Manifest is not None:
+                        Manifest.add(Chunk, Keys)
+            finally:
+                if Renderer is not None:
+                    Renderer.close()
+        else:
+            Profile = None if Stats is None else Stats.Profile
+            with multiprocessing.Pool(workers, initializer = _initRenderWorker,
+                                      initargs = (Band, Folder, dt, PlotLimits, dpi, Encoder is not None, Backend,
+                                                  Stats is not None, Profile)) as Pool:
+                Results = Pool.imap(_renderWorkerFrames, Chunks) #In order
+                for Chunk, (Output, WorkerStats) in zip(Chunks, Results):
+                    if Stats is not None:
+                        Stats.merge(WorkerStats)
+                    for Frame in Output:
+                        Encoder.write(Frame)
+                    if Manifest is not None:
+                        Manifest.add(Chunk, Keys)
+    finally:
+        if Encoder is not None:
+            Encoder.close()
+        if Stats is not None:
+            Stats.stop()
+        if Manifest is not None:
+            Manifest.close()
+
+
+def makeDraft(Band,Folder,Steps,dt,Every = 5,dpi = 40,PlotLimits = [[-20,20],[-60,65]],Backend = 'raster',
+              workers = 1, Encoder = None):
+    """
+    Make a quick preview of the animation: every "Every"th frame is rendered at a
+    low resolution, to 1.png, 2.png, ... in "Folder".
+
+    The states of all frames are sampled once to the trajectory file 'Draft.qmt'
+    in "Folder". This is returned, and can be passed to makeOutput instead of the
+    band for the final rendering of all frames, which then reuses these states
+    (the pictures are the same as those of the band).
+
+    Input:
+    Band: BandCls, ShowCls or CompiledShowCls object (e.g. from loadShow)
+    Folder: output folder of the preview, will be created if required. Also
+    used for the trajectory file if "Encoder" is given.
+    Steps: number of frames of the final animation
+    dt: time in beats between each frame of the final animation
+    Every (optional = 5): render one in this many frames
+    dpi (optional = 40): resolution of the preview pictures
+    PlotLimits (optional): plot limits, or 'auto' (see makeOutput)
+    Backend (optional = 'raster'): rendering backend of the preview
+    workers, Encoder (optional): see makeOutput
+
+    Returns the TrajectoryCls with the states of all frames.
+    """
+    if int(Every) < 1:
+        raise ValueError('"Every" should be more than 0')
+    if not os.path.exists(Folder):
+        os.mkdir(Folder)
+    Steps = int(Steps)
+    Every = int(Every)
+    Path = os.path.join(Folder, 'Draft.qmt')
+    exportTrajectory(Band, Path + '.tmp', Steps, dt, dtype = 'float64')
+    os.replace(Path + '.tmp', Path) #A previous draft that is still open keeps its data
+    Trajectory = TrajectoryCls(Path)
+    if isinstance(PlotLimits, str) and PlotLimits == 'auto': #Fit to all frames, not only the preview
+        PlotLimits = fitLimits(Trajectory, Steps, dt)
+    makeOutput(Trajectory, None if Encoder is not None else Folder, (Steps - 1) // Every + 1, Every * dt,
+               PlotLimits, dpi, workers = workers, Encoder = Encoder, Backend = Backend)
+    return Trajectory
+
+
+def getImagePath(Folder,Frame):
+    """
+    Returns the path of the image of "Frame" (starting at 0) in "Folder": Folder/n+1.png
+    """
+    return os.path.join(Folder, str(Frame + 1) + '.png')
+
+
+def getShardRange(Steps,Shard = None,Range = None):
+    """
+    Returns the frames [Start, Stop] of a shard of a show with "Steps" frames.
+    "Shard" is [Index, Count]: shard "Index" (0 ... Count - 1) of "Count" equal
+    shards of contiguous frames. Otherwise, "Range" [Start, Stop] is checked and returned.
+    """
+    if Shard is not None:
+        if Range is not None:
+            raise ValueError('Give either "Shard" or "Range"')
+        Index, Count = int(Shard[0]), int(Shard[1])
+        if not 0 <= Index < Count:
+            raise ValueError('"Shard" should be [Index, Count], with 0 <= Index < Count')
+        return [Steps * Index // Count, Steps * (Index + 1) // Count]
+    Start, Stop = int(Range[0]), int(Range[1])
+    if not 0 <= Start <= Stop <= Steps:
+        raise ValueError('"Range" should be [Start, Stop], with 0 <= Start <= Stop <= Steps')
+    return [Start, Stop]
+
+
+def getFrameKeys(Band,Steps,dt,PlotLimits = [[-20,20],[-60,65]], dpi = 150, Backend = 'matplotlib', Frames = None):
+    """
+    Returns a list with the key of every frame: a hash of the band state and the
+    render settings. If "Frames" (list of frame numbers) is given, only the keys
+    of these frames are returned.
+    """
+    Renderer = getRenderer(Backend)
+    Settings = json.dumps([ManifestCls.Version, Renderer.__module__ + '.' + Renderer.__name__,
+                           PlotLimits, dpi, Band.getColours()]).encode('utf-8')
+    Settings += Band.getSymbols().tobytes()
+    if Frames is None:
+        Frames = range(Steps)
+    Keys = []
+    for Time, Pos, Angle in Band.iterTimes(Frame * dt for Frame in Frames):
+        Hash = hashlib.sha1(Settings)
+        Hash.update(np.ascontiguousarray(Pos, dtype = float).tobytes())
+        Hash.update(np.ascontiguousarray(Angle, dtype = float).tobytes())
+        Keys.append(Hash.hexdigest())
+    return Keys
+
+
+class ManifestCls:
+    """
+    Record of the frames in an output folder, and the keys they were rendered with.
+    It is stored as a log file in the folder, to which lines 'frame key size mtime inode'
+    are appended once the images of these frames are written. Later lines replace
+    earlier ones. On close, the log is rewritten with only the current entries.
+
+    Shards (see makeOutput) that render into the same folder each log to their own
+    file, '.QuickMarchFrames.start-stop'. All logs in the folder are read. An entry
+    only holds while the image still has the recorded size, modification time and
+    inode, so entries of images that have been written again by another shard are
+    ignored. Closing the log of a complete run (not a shard) merges the logs of
+    the shards into it (see also mergeOutput).
+
+    Inputs:
+    Folder: output folder
+    Range (optional = None): [Start, Stop] frames of a shard, that logs to its own file
+    """
+    Name = '.QuickMarchFrames' #File name of the log
+    Version = 1 #Changes of the rendering that invalidate existing frames increase this
+
+    def __init__(self,Folder,Range = None):
+        self.Folder = Folder
+        self.Range = Range
+        if Range is None:
+            self.Path = os.path.join(Folder, self.Name)
+        else:
+            self.Path = os.path.join(Folder, self.Name + '.' + str(Range[0]) + '-' + str(Range[1]))
+        self.Entries = {} #Frame number: list of (key, image stat) of all logs
+        self.Images = {} #Frame number: stat of the image, when last checked
+        self.Logs = [] #The logs of shards that were read
+        for f in sorted(os.listdir(Folder)):
+            if f == self.Name or (f.startswith(self.Name + '.') and not f.endswith('.tmp')):
+                Path = os.path.join(Folder, f)
+                if f != self.Name:
+                    self.Logs.append(Path)
+                self.read(Path)
+        self.File = None
+
+    def read(self,Path):
+        """
+        Read the entries of the log at "Path"
+        """
+        Keys = {}
+        try:
+            with open(Path) as f:
+                for Line in f:
+                    Parts = Line.split()
+                    if len(Parts) in (2, 5) and all(Part.isdigit() for Part in Parts[:1] + Parts[2:]):
+                        Keys[int(Parts[0])] = (Parts[1], tuple(int(Part) for Part in Parts[2:]) or None)
+        except FileNotFoundError: #Merged by another process
+            return
+        for Frame, Entry in Keys.items():
+            self.Entries.setdefault(Frame, []).append(Entry)
+
+    def getImage(self,Frame):
+        return getImagePath(self.Folder, Frame)
+
+    def getStat(self,Frame,Cached = True):
+        """
+        Returns (size, mtime, inode) of the image of "Frame", or None if it does not exist
+        """
+        if not Cached or Frame not in self.Images:
+            try:
+                Stat = os.stat(self.getImage(Frame))
+                self.Images[Frame] = (Stat.st_size, Stat.st_mtime_ns, Stat.st_ino)
+            except FileNotFoundError:
+                self.Images[Frame] = None
+        return self.Images[Frame]
+
+    def getKey(self,Frame):
+        """
+        Returns the key of the image of "Frame", or None if it has no (valid) entry
+        """
+        Stat = self.getStat(Frame)
+        if Stat is None:
+            return None
+        Entries = self.Entries.get(Frame, [])
+        for Key, EntryStat in Entries:
+            if EntryStat == Stat:
+                return Key
+        for Key, EntryStat in Entries:
+            if EntryStat is None: #Written before the stat was logged
+                return Key
+        return None
+
+    def isCurrent(self,Frame,Key):
+        """
+        Returns True if the image of "Frame" exists and was rendered with "Key"
+        """
+        return self.getKey(Frame) == Key
+
+    def prune(self,Steps):
+        """
+        Remove the numbered images (and entries) of frames beyond "Steps"
+        """
+        for f in os.listdir(self.Folder):
+            Name, Extension = os.path.splitext(f)
+            if Extension == '.png' and Name.isdigit() and not 0 < int(Name) <= Steps:
+                os.remove(os.path.join(self.Folder, f))
+        self.Entries = dict((Frame, Entries) for Frame, Entries in self.Entries.items() if Frame < Steps)
+        self.Images = {}
+
+    def remove(self,Frames):
+        """
+        Remove the images and entries of "Frames"
+        """
+        for Frame in Frames:
+            if os.path.lexists(self.getImage(Frame)):
+                os.remove(self.getImage(Frame))
+            self.Entries.pop(Frame, None)
+            self.Images.pop(Frame, None)
+
+    def add(self,Frames,Keys):
+        """
+        Record that "Frames" have been written, with their key in "Keys" (indexed by frame)
+        """
+        if self.File is None:
+            self.File = open(self.Path, 'a')
+        for Frame in Frames:
+            Stat = self.getStat(Frame, Cached = False)
+            if Stat is None:
+                continue
+            self.Entries[Frame] = [(Keys[Frame], Stat)]
+            self.File.write(' '.join([str(Frame), Keys[Frame]] + [str(x) for x in Stat]) + '\n')
+        self.File.flush()
+
+    def close(self):
+        """
+        Rewrite the log with the current entries (of the frames of the shard). For
+        a complete run, the logs of the shards are merged into it and removed.
+        """
+        if self.File is not None:
+            self.File.close()
+            self.File = None
+        Temp = self.Path + '.tmp'
+        with open(Temp, 'w') as f:
+            for Frame in sorted(self.Entries):
+                if self.Range is not None and not self.Range[0] <= Frame < self.Range[1]:
+                    continue
+                Key = self.getKey(Frame)
+                if Key is not None:
+                    f.write(' '.join([str(Frame), Key] + [str(x) for x in self.getStat(Frame)]) + '\n')
+        os.replace(Temp, self.Path)
+        if self.Range is None:
+            for Path in self.Logs:
+                try:
+                    os.remove(Path)
+                except FileNotFoundError: #Merged by another process
+                    pass
+            self.Logs = []
+
+
+def mergeOutput(Folder,Steps,Band = None,dt = None,PlotLimits = [[-20,20],[-60,65]], dpi = 150, Backend = 'matplotlib'):
+    """
+    Merge the logs of the shards that rendered into "Folder" (see makeOutput), and
+    check that the images of all "Steps" frames are present, before encoding them.
+    This should be run when all shards are done. Images beyond "Steps" are removed.
+
+    If "Band" and "dt" are given, the frames must also be up to date: rendered
+    from this band with these settings (the same as given to makeOutput).
+
+    Raises a RuntimeError with the missing image numbers, if any.
+
+    Input:
+    Folder: output folder
+    Steps: number of animation frames
+    Band (optional = None): BandCls object, to check that the frames are up to date
+    dt (optional = None): time in beats between each frame
+    PlotLimits, dpi, Backend (optional): see makeOutput
+    """
+    Steps = int(Steps)
+    Manifest = ManifestCls(Folder)
+    Manifest.prune(Steps)
+    if Band is None:
+        Missing = [Frame for Frame in range(Steps) if Manifest.getKey(Frame) is None]
+    else:
+        if isinstance(PlotLimits, str) and PlotLimits == 'auto':
+            PlotLimits = fitLimits(Band, Steps, dt)
+        Keys = getFrameKeys(Band, Steps, dt, PlotLimits, dpi, Backend)
+        Missing = [Frame for Frame in range(Steps) if not Manifest.isCurrent(Frame, Keys[Frame])]
+    Manifest.close()
+    if Missing:
+        Ranges = []
+        for Frame in Missing:
+            if Ranges and Ranges[-1][1] == Frame:
+                Ranges[-1][1] = Frame + 1
+            else:
+                Ranges.append([Frame, Frame + 1])
+        Text = [str(Start + 1) if Stop == Start + 1 else str(Start + 1) + '-' + str(Stop) for Start, Stop in Ranges]
+        raise RuntimeError(str(len(Missing)) + ' of ' + str(Steps) + ' frames are missing or out of date in "'
+                           + Folder + '": ' + ', '.join(Text))
+
+
+def renderFrames(Band,Folder,Frames,dt,PlotLimits = [[-20,20],[-60,65]], dpi = 150, Renderer = None, Sink = None,
+                 Backend = 'matplotlib', Stats = None, Previous = None):
+    """
+    Render a set of frames of the band animation. Frame n is the band at time
+    n * dt, and is saved as 'n+1.png' in Folder. The band states are taken from
+    Band.iterTimes, so the band itself is not changed.
+
+    A frame of which the state is exactly equal to that of the previous frame
+    (e.g. when the band stands still) is not drawn again: its image is a hard
+    link to (or, if links are not supported, a copy of) the previous image, and
+    the previous RGB array is passed to "Sink" again.
+
+    Input:
+    Band: BandCls object
+    Folder: output folder
+    Frames: iterable of frame numbers (starting at 0)
+    dt: time in beats between each frame
+    PlotLimits (optional): plot limits as list of lists: [[xmin, xmax],[ymin, ymax]]
+    dpi (optional = 150): resolution of output picture
+    Renderer (optional): renderer object to reuse
+    Sink (optional = None): function that is called with the RGB array of each
+    frame (see canvasRGB). If given, no images are saved.
+    Backend (optional = 'matplotlib'): rendering backend used if no "Renderer" is given
+    Stats (optional = None): StatsCls object that records the stage durations
+    Previous (optional = None): dict with the last frame of a previous call, which
+    is updated with the last frame of this call. Pass the same dict to calls
+    that render consecutive frames, such that repeated frames are also found
+    across calls.
+
+    Returns the renderer object.
+    """
+    if Renderer is None:
+        Renderer = getRenderer(Backend)(Band, PlotLimits, dpi)
+    Clock = time.perf_counter
+    if Previous is None:
+        Previous = {}
+    Frames = list(Frames)
+    States = Band.iterTimes(Frame * dt for Frame in Frames)
+    for Frame in Frames:
+        if Stats is not None:
+            Stats.startFrame(Frame)
+        Time0 = Clock()
+        Time, Pos, Angle = next(States)
+        Time1 = Clock()
+        Repeat = (Previous.get('Sink') == (Sink is not None) and np.array_equal(Previous['Pos'], Pos)
+                  and np.array_equal(Previous['Angle'], Angle))
+        Path = getImagePath(Folder, Frame) if Sink is None else None
+        if Repeat:
+            Time2 = Time3 = Clock()
+            if Sink is None:
+                linkFile(Previous['Path'], Path)
+            else:
+                Sink(Previous['Data'])
+        else:
+            Renderer.draw(Pos, Angle)
+            Time2 = Clock()
+            if Sink is None:
+                Data = Renderer.getPNG()
+                Time3 = Clock()
+                if os.path.lexists(Path): #Do not write into an image that other frames may link to
+                    os.remove(Path)
+                with open(Path, 'wb') as f:
+                    f.write(Data)
+            else:
+                Data = Renderer.getRGB()
+                Time3 = Clock()
+                Sink(Data)
+            Previous.update(Pos = Pos, Angle = Angle, Sink = Sink is not None, Data = None if Sink is None else Data)
+        Previous['Path'] = Path
+        if Stats is not None:
+            Stats.record(Frame, [Time1 - Time0, Time2 - Time1, Time3 - Time2, Clock() - Time3])
+    return Renderer
+
+
+def linkFile(Source,Path):
+    """
+    Make "Path" a hard link to the file "Source", or a copy if the file system
+    does not support links. An existing file at "Path" is replaced.
+    """
+    if os.path.lexists(Path):
+        os.remove(Path)
+    try:
+        os.link(Source, Path)
+    except OSError:
+        shutil.copyfile(Source, Path)
+
+
+class StatsCls:
+    """
+    Collects timing statistics of makeOutput. For every rendered frame, the
+    duration of each stage is recorded:
+    state: evaluation of the band (setTime)
+    draw: drawing the frame
+    encode: PNG compression (or conversion to RGB when streaming)
+    write: writing the file (or passing the frame to the encoder)
+
+    Inputs:
+    Callback (optional = None): function that is called after each frame with
+    (frame number, dict with the stage durations in seconds)
+    Profile (optional = None): [first, last] range of frame numbers (last not
+    included) that is run under cProfile. See getProfile.
+
+    Routines:
+    getTotals: total duration of each stage
+    getPercentiles: percentiles of the stage durations per frame
+    summary: dict with all statistics
+    report: printable summary
+    getProfile: pstats.Stats of the profiled frames
+    """
+    Stages = ['state', 'draw', 'encode', 'write']
+
+    def __init__(self,Callback = None,Profile = None):
+        self.Callback = Callback
+        self.Profile = Profile
+        self.Frames = {} #Frame number: list with the duration of each stage
+        self.Wall = 0.0 #Total (wall clock) duration of makeOutput
+        self.Profiler = None
+        self.ProfileData = {} #Collected cProfile data (pstats format)
+        self.StartTime = None
+
+    def start(self):
+        self.StartTime = time.perf_counter()
+
+    def stop(self):
+        if self.StartTime is not None:
+            self.Wall += time.perf_counter() - self.StartTime
+            self.StartTime = None
+        self.stopProfile()
+
+    def startFrame(self,Frame):
+        if self.Profile is None:
+            return
+        if self.Profile[0] <= Frame < self.Profile[1]:
+            if self.Profiler is None:
+                self.Profiler = cProfile.Profile()
+            self.Profiler.enable()
+
+    def stopProfile(self):
+        if self.Profiler is not None:
+            self.Profiler.disable()
+            self.Profiler.create_stats()
+            self.mergeProfile(self.Profiler.stats)
+            self.Profiler = None
+
+    def mergeProfile(self,Data):
+        #Add cProfile data (dict in pstats format) to the collected data
+        for Function, (cc, nc, tt, ct, Callers) in Data.items():
+            if Function in self.ProfileData:
+                Old = self.ProfileData[Function]
+                Merged = dict(Old[4])
+                for Caller, Value in Callers.items():
+                    if Caller in Merged:
+                        Merged[Caller] = tuple(a + b for a, b in zip(Merged[Caller], Value))
+                    else:
+                        Merged[Caller] = Value
+                self.ProfileData[Function] = (Old[0] + cc, Old[1] + nc, Old[2] + tt, Old[3] + ct, Merged)
+            else:
+                self.ProfileData[Function] = (cc, nc, tt, ct, dict(Callers))
+
+    def record(self,Frame,Durations):
+        """
+        Record the stage durations (list, in the order of Stages) of a frame
+        """
+        if self.Profiler is not None:
+            self.Profiler.disable()
+        self.Frames[Frame] = Durations
+        if self.Callback is not None:
+            self.Callback(Frame, dict(zip(self.Stages, Durations)))
+
+    def merge(self,Other):
+        """
+        Add the frames and profile data of another StatsCls (e.g. of a worker process)
+        """
+        for Frame in sorted(Other.Frames):
+            self.record(Frame, Other.Frames[Frame])
+        Other.stopProfile()
+        self.mergeProfile(Other.ProfileData)
+
+    def getArray(self):
+        #Returns a (frames x stages) array with the durations, sorted on frame number
+        return np.array([self.Frames[Frame] for Frame in sorted(self.Frames)], dtype = float).reshape(-1, len(self.Stages))
+
+    def getTotals(self):
+        """
+        Returns a dict with the total duration of each stage
+        """
+        return dict(zip(self.Stages, self.getArray().sum(axis = 0).tolist()))
+
+    def getPercentiles(self,Percentiles = [50, 90, 99]):
+        """
+        Returns a dict with for each stage a dict of the percentiles of the duration per frame
+        """
+        Array = self.getArray()
+        Result = {}
+        for Index, Stage in enumerate(self.Stages):
+            if len(Array) == 0:
+                Result[Stage] = dict((Percentile, None) for Percentile in Percentiles)
+            else:
+                Values = np.percentile(Array[:,Index], Percentiles)
+                Result[Stage] = dict(zip(Percentiles, Values.tolist()))
+        return Result
+
+    def summary(self,Percentiles = [50, 90, 99]):
+        """
+        Returns a dict with the number of frames, wall time, frames per second,
+        and the totals and percentiles of the stages
+        """
+        Frames = len(self.Frames)
+        return {'frames': Frames, 'wall': self.Wall,
+                'fps': Frames / self.Wall if self.Wall > 0 else None,
+                'totals': self.getTotals(), 'percentiles': self.getPercentiles(Percentiles)}
+
+    def report(self,Percentiles = [50, 90, 99]):
+        """
+        Returns a printable summary of the statistics
+        """
+        Summary = self.summary(Percentiles)
+        Lines = ['Frames: ' + str(Summary['frames']) + ', wall time: ' + '%.3f' % Summary['wall'] + ' s']
+        Lines.append('%-8s %10s' % ('stage', 'total [s]') + ''.join('%10s' % ('p' + str(x) + ' [ms]') for x in Percentiles))
+        for Stage in self.Stages:
+            Values = [Summary['percentiles'][Stage][x] for x in Percentiles]
+            Lines.append('%-8s %10.3f' % (Stage, Summary['totals'][Stage]) +
+                         ''.join('%10.2f' % (1e3 * x) if x is not None else '%10s' % '-' for x in Values))
+        return '\n'.join(Lines)
+
+    def getProfile(self):
+        """
+        Returns a pstats.Stats object with the profile of the profiled frames,
+        or None if nothing was profiled
+        """
+        if not self.ProfileData:
+            return None
+        Data = self.ProfileData
+
+        class Holder: #pstats loads from an object with create_stats and stats
+            def create_stats(self):
+                pass
+        Holder.stats = Data
+        return pstats.Stats(Holder())
+
+
+def ffmpegCommand(Output, Framerate, Options = '-vcodec libx264rgb -preset slow -qp 0'):
+    """
+    Returns an encoder command for makeOutput, which lets ffmpeg encode the
+    raw RGB frames to a movie.
+
+    Input:
+    Output: path of the movie file
+    Framerate: frames per second
+    Options (optional): output options of ffmpeg
+    """
+    return ('ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r ' + str(Framerate) +
+            ' -i - ' + Options + ' ' + Output)
+
+
+class EncoderCls:
+    """
+    Streams raw RGB frames to the stdin of an encoder subprocess. The process is
+    started when the first frame arrives, as its command may need the frame size.
+    Frames are written by a separate thread, such that writing to the pipe
+    overlaps with rendering of the next frame.
+
+    Inputs:
+    Command: command as a string (run by the shell) or a list of arguments. The
+    placeholders {width} and {height} are replaced by the frame size in pixels.
+    QueueSize (optional = 4): maximum number of frames waiting to be written
+    """
+    def __init__(self,Command,QueueSize = 4):
+        self.Command = Command
+        self.Process = None
+        self.Size = None #[width, height] of the frames
+        self.Error = None #Exception raised by the writer thread
+        self.Queue = queue.Queue(QueueSize)
+        self.Thread = None
+
+    def start(self,Width,Height):
+        Shell = isinstance(self.Command, str)
+        if Shell:
+            Command = self.Command.format(width = Width, height = Height)
+        else:
+            Command = [str(x).format(width = Width, height = Height) for x in self.Command]
+        self.Size = [Width, Height]
+        self.Process = subprocess.Popen(Command, stdin = subprocess.PIPE, shell = Shell)
+        self.Thread = threading.Thread(target = self._writer)
+        self.Thread.daemon = True
+        self.Thread.start()
+
+    def _writer(self):
+        while True:
+            Data = self.Queue.get()
+            if Data is None:
+                return
+            if self.Error is None:
+                try:
+                    self.Process.stdin.write(Data)
+                except (OSError, ValueError) as Error: #Keep consuming, such that write() does not block
+                    self.Error = Error
+
+    def write(self,Frame):
+        """
+        Queue a frame ((height x width x 3) uint8 RGB array) for writing
+        """
+        Height, Width = Frame.shape[:2]
+        if self.Process is None:
+            self.start(Width, Height)
+        elif [Width, Height] != self.Size:
+            raise ValueError('Frame size ' + str([Width, Height]) + ' differs from ' + str(self.Size))
+        if self.Error is not None:
+            raise RuntimeError('Writing to the encoder failed: ' + str(self.Error))
+        self.Queue.put(Frame.tobytes())
+
+    def close(self):
+        """
+        Write all remaining frames, close the pipe and wait for the encoder to finish
+        """
+        if self.Process is None:
+            return
+        self.Queue.put(None)
+        self.Thread.join()
+        try:
+            self.Process.stdin.close()
+        except OSError:
+            pass
+        Code = self.Process.wait()
+        self.Process = None
+        if Code != 0:
+            raise RuntimeError('Encoder exited with code ' + str(Code))
+        if self.Error is not None:
+            raise RuntimeError('Writing to the encoder failed: ' + str(self.Error))
+
+
+#State of a render worker process: the band, output settings and the renderer
+_RenderWorker = {}
+
+def _initRenderWorker(Band,Folder,dt,PlotLimits,dpi,Stream,Backend,Timed,Profile):
+    _RenderWorker.clear()
+    _RenderWorker.update(Band = Band, Folder = Folder, dt = dt, PlotLimits = PlotLimits,
+                         dpi = dpi, Stream = Stream, Backend = Backend, Timed = Timed,
+                         Profile = Profile, Renderer = None, Previous = {})
+
+def _renderWorkerFrames(Frames):
+    #Renders the frames. When streaming, the RGB arrays are returned in order.
+    #Returns these arrays and the StatsCls of the frames (if timed).
+    Worker = _RenderWorker
+    Output = []
+    Sink = Output.append if Worker['Stream'] else None
+    Stats = StatsCls(Profile = Worker['Profile']) if Worker['Timed'] else None
+    Worker['Renderer'] = renderFrames(Worker['Band'], Worker['Folder'], Frames, Worker['dt'],
+                                      Worker['PlotLimits'], Worker['dpi'], Worker['Renderer'], Sink,
+                                      Worker['Backend'], Stats, Worker['Previous'])
+    if Stats is not None:
+        Stats.stopProfile()
+    return Output, Stats
@@ -0,0 +1,435 @@
+import numpy as np
+import sys
+import math
+import struct
+import zlib
+import io
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Rendering backends. matplotlib is only imported when it is used (see loadPyplot).
+
+def loadPyplot(Batch = True):
+    """
+    Returns matplotlib.pyplot, which is imported on first use. For batch output,
+    the non-interactive Agg backend is selected, unless pyplot was already imported
+    (e.g. by the calling script), in which case its backend is kept.
+
+    Input:
+    Batch (optional = True): select the Agg backend
+    """
+    if Batch and 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        matplotlib.use('Agg')
+    import matplotlib.pyplot
+    return matplotlib.pyplot
+
+
+def symbolVertices(Symbols,Pos,Angle):
+    """
+    Rotates and translates the symbols of all players at once.
+
+    Inputs:
+    Symbols: (players x vertices x 2) array with polar [r, angle] coordinates
+    Pos: (players x 2) array with the player positions
+    Angle: array with the player angles
+
+    Returns a (players x vertices x 2) array with the [x,y] vertices.
+    """
+    Angles = np.radians(np.asarray(Angle)[:,None] + Symbols[:,:,1])
+    Verts = np.empty(Symbols.shape)
+    Verts[:,:,0] = Symbols[:,:,0] * np.cos(Angles) + np.asarray(Pos)[:,None,0]
+    Verts[:,:,1] = Symbols[:,:,0] * np.sin(Angles) + np.asarray(Pos)[:,None,1]
+    return Verts
+
+
+def symbolRadius(Symbols):
+    """
+    Returns an array with the radius of the circle around each player that
+    contains its symbol
+
+    Input:
+    Symbols: (players x vertices x 2) array with polar [r, angle] coordinates
+    """
+    if Symbols.shape[1] == 0:
+        return np.zeros(len(Symbols))
+    return np.abs(Symbols[:,:,0]).max(axis = 1)
+
+def visiblePlayers(Pos,Radius,limits):
+    """
+    Returns an array with the indices of the players that can be visible in the
+    region "limits" ([[xmin, xmax],[ymin, ymax]]), i.e. of which the circle with
+    "Radius" (array) around the position overlaps it.
+    """
+    Pos = np.asarray(Pos).reshape(-1,2)
+    return np.nonzero((Pos[:,0] + Radius >= limits[0][0]) & (Pos[:,0] - Radius <= limits[0][1]) &
+                      (Pos[:,1] + Radius >= limits[1][0]) & (Pos[:,1] - Radius <= limits[1][1]))[0]
+
+def lineMargin(ax,limits,LineWidth = 1.0):
+    """
+    Returns (an upper limit of) the width of a line of "LineWidth" points in data
+    units, for the axis "ax" with "limits"
+    """
+    Width, Height = ax.figure.get_size_inches()
+    Box = ax.get_position()
+    XScale = (limits[0][1] - limits[0][0]) / (Width * Box.width)
+    YScale = (limits[1][1] - limits[1][0]) / (Height * Box.height)
+    return LineWidth / 72 * max(XScale, YScale)
+
+
+class RendererCls:
+    """
+    Reusable renderer of a band. The figure, axis and a single PolyCollection
+    with the symbols of all players are created once. For each frame only the
+    vertices (and, if changed, the colours) are updated, and the collection is
+    blitted on the saved background. Players outside the plot limits are left out.
+
+    Inputs:
+    Band: BandCls object, of which the symbols and colours are used
+    limits (optional): plot limits as list of lists: [[xmin, xmax],[ymin, ymax]]
+    dpi (optional = 150): resolution of output picture
+
+    Routines:
+    draw: draw the band state on the canvas
+    save: save the canvas as a picture
+    getPNG: returns the canvas as PNG file contents
+    getRGB: returns the canvas as an RGB array
+    """
+    def __init__(self,Band,limits = [[-20,20],[-60,65]], dpi = 150):
+        self.Symbols = Band.getSymbols()
+        self.Colours = Band.getColours()
+        self.dpi = dpi
+        self.plt = loadPyplot()
+        from matplotlib.collections import PolyCollection
+        self.Fig = self.plt.figure(dpi = dpi)
+        self.ax = self.Fig.add_subplot(111)
+        self.Collection = PolyCollection([], facecolors = self.Colours, edgecolors = self.Colours,
+                                         joinstyle = 'miter', animated = True)
+        self.ax.add_collection(self.Collection)
+        self.ax.axis('equal')
+        self.ax.axis('off')
+        self.ax.set_xlim(limits[0])
+        self.ax.set_ylim(limits[1])
+        self.Background = None
+        #The visible region is a part of the limits (see viewLimits), so players outside
+        #of the limits (with their symbol and edge line) are never visible
+        self.Radius = symbolRadius(self.Symbols) + lineMargin(self.ax, limits)
+        self.Limits = limits
+        self.Shown = None #Indices of the players in the collection
+
+    def draw(self,Pos,Angle,Colours = None):
+        """
+        Draw a band state on the canvas
+
+        Inputs:
+        Pos: (players x 2) array with the player positions
+        Angle: array with the player angles
+        Colours (optional = None): list of colours, if they changed
+        """
+        if Colours is not None and Colours != self.Colours:
+            self.Colours = list(Colours)
+            self.Shown = None
+        Pos = np.asarray(Pos)
+        Shown = visiblePlayers(Pos, self.Radius, self.Limits)
+        if self.Shown is None or not np.array_equal(Shown, self.Shown):
+            self.Shown = Shown
+            Colours = [self.Colours[Index] for Index in Shown]
+            self.Collection.set_facecolors(Colours)
+            self.Collection.set_edgecolors(Colours)
+        self.Collection.set_verts(symbolVertices(self.Symbols[Shown], Pos[Shown], np.asarray(Angle)[Shown]))
+        Canvas = self.Fig.canvas
+        if self.Background is None: #Draw everything except the players once
+            Canvas.draw()
+            self.Background = Canvas.copy_from_bbox(self.Fig.bbox)
+        else:
+            Canvas.restore_region(self.Background)
+        self.ax.draw_artist(self.Collection)
+        Canvas.blit(self.Fig.bbox)
+
+    def save(self,Path):
+        """
+        Save the canvas to "Path" (including file extension, i.e. .png)
+        """
+        self.plt.imsave(Path, np.asarray(self.Fig.canvas.buffer_rgba()), dpi = self.dpi)
+
+    def getPNG(self):
+        """
+        Returns the canvas as PNG file contents (bytes)
+        """
+        Data = io.BytesIO()
+        self.plt.imsave(Data, np.asarray(self.Fig.canvas.buffer_rgba()), format = 'png', dpi = self.dpi)
+        return Data.getvalue()
+
+    def getRGB(self):
+        """
+        Returns the canvas as an (height x width x 3) uint8 RGB array
+        """
+        return canvasRGB(self.Fig)
+
+    def close(self):
+        self.plt.close(self.Fig)
+
+
+def canvasRGB(Fig):
+    """
+    Returns a copy of the drawn canvas of figure "Fig" as an (height x width x 3)
+    uint8 RGB array
+    """
+    return np.ascontiguousarray(np.asarray(Fig.canvas.buffer_rgba())[:,:,:3])
+
+
+FigSize = [6.4, 4.8] #Size of the output pictures in inches (matplotlib default)
+AxesBox = [0.125, 0.11, 0.9, 0.88] #Plot area as fraction of the picture [left, bottom, right, top]
+
+def viewLimits(limits,Size = FigSize,Box = AxesBox):
+    """
+    Returns the region [[xmin, xmax],[ymin, ymax]] that is visible in a plot with
+    "limits" and an equal aspect ratio. Like matplotlib with axis('equal'), this
+    is the centred part of the limits that has the aspect ratio of the plot area.
+
+    Inputs:
+    limits: plot limits as list of lists: [[xmin, xmax],[ymin, ymax]]
+    Size (optional): [width, height] of the picture
+    Box (optional): plot area as fraction of the picture [left, bottom, right, top]
+    """
+    Width = Size[0] * (Box[2] - Box[0])
+    Height = Size[1] * (Box[3] - Box[1])
+    XRange = limits[0][1] - limits[0][0]
+    YRange = limits[1][1] - limits[1][0]
+    Scale = max(Width / XRange, Height / YRange)
+    XCentre = 0.5 * (limits[0][0] + limits[0][1])
+    YCentre = 0.5 * (limits[1][0] + limits[1][1])
+    return [[XCentre - 0.5 * Width / Scale, XCentre + 0.5 * Width / Scale],
+            [YCentre - 0.5 * Height / Scale, YCentre + 0.5 * Height / Scale]]
+
+
+def fitLimits(Band,Steps,dt,Start = 0,Margin = 1.0,Size = FigSize,Box = AxesBox):
+    """
+    Returns plot limits [[xmin, xmax],[ymin, ymax]] that contain all players of
+    the band at all times Start + n * dt (n = 0 ... Steps - 1). The bounding box
+    of the symbols is found in a single pass over the states, and is widened to
+    the aspect ratio of the plot area, such that it is completely visible (see
+    viewLimits).
+
+    Inputs:
+    Band: BandCls object (or another object with iterStates and getSymbols)
+    Steps: number of frames
+    dt: time in beats between each frame
+    Start (optional = 0): time of the first frame
+    Margin (optional = 1.0): extra space around the players
+    Size (optional): [width, height] of the picture
+    Box (optional): plot area as fraction of the picture [left, bottom, right, top]
+    """
+    Radius = symbolRadius(Band.getSymbols())[:,None]
+    if len(Radius) == 0:
+        raise ValueError('The band has no players')
+    Low = np.full(2, np.inf)
+    High = np.full(2, -np.inf)
+    for Time, Pos, Angle in Band.iterStates(dt, Steps, Start):
+        np.minimum(Low, (Pos - Radius).min(axis = 0), out = Low)
+        np.maximum(High, (Pos + Radius).max(axis = 0), out = High)
+    Low -= Margin
+    High += Margin
+    Centre = 0.5 * (Low + High)
+    Range = High - Low
+    Aspect = (Size[0] * (Box[2] - Box[0])) / (Size[1] * (Box[3] - Box[1])) #Width / height of the plot area
+    Range = np.maximum(Range, [Range[1] * Aspect, Range[0] / Aspect])
+    return [[float(Centre[0] - 0.5 * Range[0]), float(Centre[0] + 0.5 * Range[0])],
+            [float(Centre[1] - 0.5 * Range[1]), float(Centre[1] + 0.5 * Range[1])]]
+
+
+#Base colours, such that simple colours are converted without matplotlib
+BaseColours = {'b': (0, 0, 1), 'g': (0, 0.5, 0), 'r': (1, 0, 0), 'c': (0, 0.75, 0.75),
+               'm': (0.75, 0, 0.75), 'y': (0.75, 0.75, 0), 'k': (0, 0, 0), 'w': (1, 1, 1)}
+
+def colourRGB(Colour):
+    """
+    Returns the [r,g,b] (0-255) value of a colour. Supported are the base colour
+    letters, '#rrggbb' strings and (r,g,b) tuples with values from 0 to 1. Other
+    colours are converted by matplotlib.
+    """
+    if isinstance(Colour, str):
+        if Colour in BaseColours:
+            Colour = BaseColours[Colour]
+        elif len(Colour) == 7 and Colour[0] == '#':
+            return [int(Colour[n:n + 2], 16) for n in (1, 3, 5)]
+        else:
+            import matplotlib.colors
+            Colour = matplotlib.colors.to_rgb(Colour)
+    return [int(round(255 * x)) for x in Colour[:3]]
+
+
+def encodePNG(Image):
+    """
+    Returns the PNG file contents (bytes) of an (height x width x 3) uint8 RGB array,
+    without matplotlib
+    """
+    Height, Width = Image.shape[:2]
+    Rows = np.empty((Height, Width * 3 + 1), dtype = np.uint8)
+    Rows[:,0] = 0 #No filter
+    Rows[:,1:] = Image.reshape(Height, Width * 3)
+
+    def Chunk(Type, Data):
+        return (struct.pack('>I', len(Data)) + Type + Data +
+                struct.pack('>I', zlib.crc32(Type + Data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            Chunk(b'IHDR', struct.pack('>IIBBBBB', Width, Height, 8, 2, 0, 0, 0)) +
+            Chunk(b'IDAT', zlib.compress(Rows.tobytes(), 1)) +
+            Chunk(b'IEND', b''))
+
+
+class RasterRendererCls:
+    """
+    Minimal renderer that fills the player symbols directly into an RGB array,
+    without matplotlib. The pictures have the same size and plot area as the
+    matplotlib renderer (for the same limits and dpi), and the symbols get the
+    same 1 point edge line, but there is no anti-aliasing. Has the same routines
+    as RendererCls.
+
+    Inputs:
+    Band: BandCls object, of which the symbols and colours are used
+    limits (optional): plot limits as list of lists: [[xmin, xmax],[ymin, ymax]]
+    dpi (optional = 150): resolution of output picture
+    """
+    MaxPoints = 2 ** 22 #Max number of pixel tests per batch of players
+    LineWidth = 1.0 #Width of the symbol edges in points
+
+    def __init__(self,Band,limits = [[-20,20],[-60,65]], dpi = 150):
+        self.Symbols = Band.getSymbols()
+        self.Colours = None
+        self.dpi = dpi
+        self.Width = int(FigSize[0] * dpi)
+        self.Height = int(FigSize[1] * dpi)
+        #Plot area in pixels, with y from the top of the picture
+        self.Box = [AxesBox[0] * self.Width, (1 - AxesBox[3]) * self.Height,
+                    AxesBox[2] * self.Width, (1 - AxesBox[1]) * self.Height]
+        self.View = viewLimits(limits)
+        self.Scale = (self.Box[2] - self.Box[0]) / (self.View[0][1] - self.View[0][0]) #Pixels per unit
+        self.Clip = [int(math.floor(self.Box[0])), int(math.floor(self.Box[1])),
+                     int(math.ceil(self.Box[2])), int(math.ceil(self.Box[3]))]
+        self.HalfWidth = 0.5 * self.LineWidth * dpi / 72 #Half the edge width in pixels
+        self.Radius = symbolRadius(self.Symbols) + 2 * self.HalfWidth / self.Scale
+        self.Image = np.empty((self.Height, self.Width, 3), dtype = np.uint8)
+        self.setColours(Band.getColours())
+
+    def setColours(self,Colours):
+        self.Colours = list(Colours)
+        self.RGB = np.array([colourRGB(Colour) for Colour in Colours], dtype = np.uint8).reshape(-1,3)
+
+    def draw(self,Pos,Angle,Colours = None):
+        """
+        Draw a band state in the picture
+
+        Inputs:
+        Pos: (players x 2) array with the player positions
+        Angle: array with the player angles
+        Colours (optional = None): list of colours, if they changed
+        """
+        if Colours is not None and Colours != self.Colours:
+            self.setColours(Colours)
+        self.Image[:] = 255
+        Pos = np.asarray(Pos)
+        Shown = visiblePlayers(Pos, self.Radius, self.View) #Cheap test, before the vertices are made
+        Verts = symbolVertices(self.Symbols[Shown], Pos[Shown], np.asarray(Angle)[Shown])
+        X = self.Box[0] + (Verts[:,:,0] - self.View[0][0]) * self.Scale
+        Y = self.Box[3] - (Verts[:,:,1] - self.View[1][0]) * self.Scale
+        XMin = np.floor(X.min(axis = 1) - self.HalfWidth).astype(int)
+        YMin = np.floor(Y.min(axis = 1) - self.HalfWidth).astype(int)
+        XMax = np.ceil(X.max(axis = 1) + self.HalfWidth).astype(int)
+        YMax = np.ceil(Y.max(axis = 1) + self.HalfWidth).astype(int)
+        Visible = np.nonzero((XMax > self.Clip[0]) & (XMin < self.Clip[2]) &
+                             (YMax > self.Clip[1]) & (YMin < self.Clip[3]))[0]
+        if len(Visible) == 0:
+            return
+        #Test the pixel centres in a fixed size window around each symbol
+        SizeX = int((XMax - XMin)[Visible].max()) + 1
+        SizeY = int((YMax - YMin)[Visible].max()) + 1
+        Batch = max(1, self.MaxPoints // (SizeX * SizeY))
+        for Start in range(0, len(Visible), Batch):
+            Players = Visible[Start:Start + Batch]
+            self.fill(Shown[Players], X[Players], Y[Players], XMin[Players], YMin[Players], SizeX, SizeY)
+
+    def fill(self,Players,X,Y,XMin,YMin,SizeX,SizeY):
+        #Fill the polygons (vertices X, Y) of "Players" with the even-odd rule,
+        #and their edges up to HalfWidth from the edge
+        PixX = XMin[:,None] + np.arange(SizeX) #(players x SizeX)
+        PixY = YMin[:,None] + np.arange(SizeY)
+        CX = (PixX + 0.5).astype(np.float32)[:,None,:]
+        CY = (PixY + 0.5).astype(np.float32)[:,:,None]
+        X = X.astype(np.float32)
+        Y = Y.astype(np.float32)
+        Inside = np.zeros((len(Players), SizeY, SizeX), dtype = bool)
+        Edge = np.zeros((len(Players), SizeY, SizeX), dtype = bool)
+        for Vertex in range(X.shape[1]):
+            X1 = X[:,Vertex,None,None]
+            Y1 = Y[:,Vertex,None,None]
+            EX = X[:,Vertex - 1,None,None] - X1 #Edge vector
+            EY = Y[:,Vertex - 1,None,None] - Y1
+            DX = CX - X1 #Pixel centres relative to the edge start
+            DY = CY - Y1
+            Crosses = (DY < 0) != (DY < EY)
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                XCross = DY * EX / EY
+            Inside ^= Crosses & (DX < XCross)
+            Length2 = np.maximum(EX ** 2 + EY ** 2, 1e-12)
+            Frac = DX * (EX / Length2) + DY * (EY / Length2) #Position of the nearest point on the edge
+            np.clip(Frac, 0, 1, out = Frac)
+            Edge |= (DX - Frac * EX) ** 2 + (DY - Frac * EY) ** 2 <= self.HalfWidth ** 2
+        Inside |= Edge
+        Inside &= ((PixX >= self.Clip[0]) & (PixX < self.Clip[2]))[:,None,:]
+        Inside &= ((PixY >= self.Clip[1]) & (PixY < self.Clip[3]))[:,:,None]
+        Index, Row, Column = np.nonzero(Inside)
+        self.Image[PixY[Index, Row], PixX[Index, Column]] = self.RGB[Players[Index]]
+
+    def save(self,Path):
+        """
+        Save the picture to "Path" as PNG
+        """
+        with open(Path, 'wb') as f:
+            f.write(self.getPNG())
+
+    def getPNG(self):
+        """
+        Returns the picture as PNG file contents (bytes)
+        """
+        return encodePNG(self.Image)
+
+    def getRGB(self):
+        """
+        Returns a copy of the picture as an (height x width x 3) uint8 RGB array
+        """
+        return self.Image.copy()
+
+    def close(self):
+        pass
+
+
+#Available rendering backends for makeOutput. A backend is a class that is created
+#with (Band, limits, dpi), and has the routines draw, save, getPNG, getRGB and close.
+Renderers = {'matplotlib': RendererCls, 'raster': RasterRendererCls}
+
+def getRenderer(Backend):
+    """
+    Returns the renderer class of "Backend": a name in Renderers or a class
+    """
+    if isinstance(Backend, str):
+        if Backend not in Renderers:
+            raise ValueError('Unknown backend "' + Backend + '", options are ' + str(sorted(Renderers)))
+        return Renderers[Backend]
+    return Backend
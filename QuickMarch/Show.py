@@ -0,0 +1,169 @@
+import numpy as np
+from .Engine import BandCls, EngineCls
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Shows with several bands on the same field. All players of all bands are
+#compiled into a single EngineCls, such that a frame of the whole show is
+#evaluated in one batched call.
+
+class ShowCls:
+    """
+    Several bands that move on a common timeline. A show can be used instead of
+    a band in makeOutput (also with workers or an encoder), renderFrames,
+    exportTrajectory and the renderers.
+
+    Inputs:
+    Bands (optional = []): list of BandCls objects
+    Colours (optional = None): list with a colour for each band. None (for all
+    bands, or for a single band) keeps the colours of the players.
+
+    Attributes:
+    Bands: list of the bands
+    Colours: list of the band colours
+    BandList: all players of all bands, in order of the bands
+    Time: current time (see setTime)
+
+    Routines:
+    addBand: add a band to the show
+    sync: continue all bands at the same time (the latest LastCTime)
+    setTime, getState, iterTimes, iterStates, getSymbols, getColours, plot:
+    see BandCls
+    """
+    def __init__(self,Bands = [],Colours = None):
+        self.Bands = []
+        self.Colours = []
+        self.Time = 0
+        self.Compiled = None #EngineCls of all players
+        self.Pos = None #State at the current time
+        self.Angle = None
+        if Colours is None:
+            Colours = [None] * len(Bands)
+        if len(Colours) != len(Bands):
+            raise ValueError('"Colours" should have a colour for each band')
+        for Band, Colour in zip(Bands, Colours):
+            self.addBand(Band, Colour)
+
+    def __getstate__(self):
+        State = self.__dict__.copy()
+        State['Compiled'] = None #Compiled again when needed
+        return State
+
+    def addBand(self,Band,Colour = None):
+        """
+        Add a band to the show
+
+        Inputs:
+        Band: BandCls object
+        Colour (optional = None): colour of all players of the band. None keeps
+        the colours of the players.
+        """
+        self.Bands.append(Band)
+        self.Colours.append(Colour)
+        self.Pos = None
+
+    @property
+    def BandList(self):
+        return [Player for Band in self.Bands for Player in Band.BandList]
+
+    @property
+    def Version(self):
+        return tuple(Band.Version for Band in self.Bands)
+
+    @property
+    def LastCTime(self):
+        return max([Band.LastCTime for Band in self.Bands] + [0])
+
+    def sync(self):
+        """
+        Set the time of the next command of all bands to the end of the band
+        that finishes last, such that the following commands start together.
+        Returns this time.
+        """
+        Time = self.LastCTime
+        for Band in self.Bands:
+            Band.LastCTime = Time
+        return Time
+
+    def getEngine(self):
+        """
+        Returns an EngineCls of all players, which is compiled again when the
+        paths or commands of any band change.
+        """
+        if self.Compiled is None or self.Compiled.Version != self.Version:
+            self.Compiled = EngineCls(self)
+        return self.Compiled
+
+    def iterTimes(self,Times):
+        """
+        Generator of the show states at "Times" (see BandCls.iterTimes)
+        """
+        return BandCls.iterTimes(self,Times)
+
+    def iterStates(self,dt,Steps,Start = 0):
+        """
+        Generator of the show states at times Start + n * dt (see BandCls.iterStates)
+        """
+        return BandCls.iterStates(self,dt,Steps,Start)
+
+    def setTime(self,NewTime):
+        """
+        Set the time of the show, and evaluate all players in a single batched call.
+        The players of the bands are not changed.
+        """
+        Dist, self.Pos, self.Angle = self.getEngine().evaluate(NewTime)
+        self.Time = NewTime
+
+    def getState(self):
+        """
+        Returns the positions (players x 2 array) and angles (array) of all players
+        of all bands at the current time
+        """
+        if self.Pos is None or self.Compiled is None or self.Compiled.Version != self.Version:
+            self.setTime(self.Time)
+        return self.Pos.copy(), self.Angle.copy()
+
+    def getSymbols(self):
+        """
+        Returns the symbols of all players (see BandCls.getSymbols)
+        """
+        Symbols = [Band.getSymbols() for Band in self.Bands]
+        Vertices = max([x.shape[1] for x in Symbols] + [1])
+        for Index, Symbol in enumerate(Symbols): #Pad with the last vertex
+            if Symbol.shape[1] < Vertices:
+                Padding = np.repeat(Symbol[:,-1:], Vertices - Symbol.shape[1], axis = 1)
+                Symbols[Index] = np.concatenate([Symbol, Padding], axis = 1)
+        return np.concatenate(Symbols).reshape(-1, Vertices, 2)
+
+    def getColours(self):
+        """
+        Returns a list with the colours of all players, with the band colours applied
+        """
+        Colours = []
+        for Band, Colour in zip(self.Bands, self.Colours):
+            if Colour is None:
+                Colours += Band.getColours()
+            else:
+                Colours += [Colour] * len(Band.BandList)
+        return Colours
+
+    def plot(self,Path,Fig = None,ax = None, limits = [[-20,20],[-60,65]], dpi = 150):
+        """
+        Make a plot of the show at the current time (see BandCls.plot)
+        """
+        return BandCls.plot(self,Path,Fig,ax,limits,dpi)
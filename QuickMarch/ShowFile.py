@@ -0,0 +1,192 @@
+import numpy as np
+import os
+import json
+import hashlib
+from .Engine import BandCls, EngineCls
+from .Show import ShowCls
+from .Commands import QuickMarch, Bend, Turn, EnglishCounter, AmericanCounter, QuickMarchReturn
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Show files describe a choreography as JSON, instead of a Python script. A file
+#holds a single band, or a list of bands in "bands":
+#{"bands": [{"size": [8, 5], "sep": [1.6, 1.6], "stride": 0.8, "pos": [0, 0], "angle": 90,
+#            "colour": "b", "commands": [["QuickMarch", 16], ["EnglishCounter"],
+#                                        ["Bend", 90, {"TotalBeats": 8}]]}]}
+#All keys except "size" are optional. Each command is a list with the name of a
+#routine in ShowCommands, followed by its arguments (after the band), and optionally
+#a dict with keyword arguments.
+#
+#loadShow compiles a show file to the arrays of an EngineCls, and caches these on
+#disk by a hash of the file contents. Loading an unchanged show reads the cache,
+#instead of executing all commands again.
+
+ShowCommands = {'QuickMarch': QuickMarch, 'Bend': Bend, 'Turn': Turn, 'EnglishCounter': EnglishCounter,
+                'AmericanCounter': AmericanCounter, 'QuickMarchReturn': QuickMarchReturn}
+ShowFileVersion = 2 #Changes that invalidate cached shows increase this
+
+def readShow(Path):
+    """
+    Returns the description (dict) of the show file "Path"
+    """
+    with open(Path) as f:
+        Description = json.load(f)
+    if not isinstance(Description, dict):
+        raise ValueError('"' + str(Path) + '" is not a QuickMarch show file')
+    return Description
+
+def getShowKey(Description):
+    """
+    Returns the content hash of a show description
+    """
+    Text = json.dumps([ShowFileVersion, Description], sort_keys = True, separators = (',', ':'))
+    return hashlib.sha1(Text.encode('utf-8')).hexdigest()
+
+def buildBand(Description):
+    """
+    Returns a BandCls made from the description of a band (see the show file format)
+    """
+    if 'size' not in Description:
+        raise ValueError('A band needs a "size"')
+    Band = BandCls(Description['size'], Sep = Description.get('sep', [1.6,1.6]),
+                   Stride = Description.get('stride', 0.8), Pos = Description.get('pos', [0,0]),
+                   Angle = Description.get('angle', 0))
+    if 'colour' in Description:
+        for Player in Band.BandList:
+            Player.Colour = Description['colour']
+    for Command in Description.get('commands', []):
+        Name = Command[0]
+        Args = list(Command[1:])
+        Kwargs = {}
+        if len(Args) and isinstance(Args[-1], dict):
+            Kwargs = Args.pop()
+        if Name not in ShowCommands:
+            raise ValueError('Unknown command "' + str(Name) + '"')
+        ShowCommands[Name](Band, *Args, **Kwargs)
+    return Band
+
+def buildShow(Description):
+    """
+    Returns the BandCls (for a single band) or ShowCls (for "bands") of a show description
+    """
+    if 'bands' not in Description:
+        return buildBand(Description)
+    return ShowCls([buildBand(Band) for Band in Description['bands']])
+
+
+class CompiledShowCls:
+    """
+    A compiled show: the arrays of an EngineCls, with the symbols and colours
+    of the players. It has the routines that makeOutput and the renderers use from
+    a BandCls (setTime, getState, iterTimes, iterStates, getSymbols, getColours, plot).
+
+    Inputs:
+    Arrays: dict with the engine arrays (see EngineCls.getArrays)
+    Symbols: (players x vertices x 2) array with the symbols (see BandCls.getSymbols)
+    Colours: list with the colours of the players
+    LastCTime: end time of the last command
+    """
+    def __init__(self,Arrays,Symbols,Colours,LastCTime):
+        self.Engine = EngineCls(None, Arrays)
+        self.Symbols = np.array(Symbols, dtype = float)
+        self.Colours = list(Colours)
+        self.LastCTime = LastCTime
+        self.Time = 0
+
+    def getEngine(self):
+        return self.Engine
+
+    def iterTimes(self,Times):
+        return BandCls.iterTimes(self,Times)
+
+    def iterStates(self,dt,Steps,Start = 0):
+        return BandCls.iterStates(self,dt,Steps,Start)
+
+    def setTime(self,NewTime):
+        self.Engine.setTime(NewTime)
+        self.Time = NewTime
+
+    def getState(self):
+        return self.Engine.Pos.copy(), self.Engine.Angle.copy()
+
+    def getSymbols(self):
+        return self.Symbols.copy()
+
+    def getColours(self):
+        return list(self.Colours)
+
+    def plot(self,Path,Fig = None,ax = None, limits = [[-20,20],[-60,65]], dpi = 150):
+        """
+        Make a plot of the show at the current time (see BandCls.plot)
+        """
+        return BandCls.plot(self,Path,Fig,ax,limits,dpi)
+
+    def save(self,Path):
+        """
+        Save the compiled show to "Path" (.npz file)
+        """
+        Arrays = self.Engine.getArrays()
+        Arrays['Symbols'] = self.Symbols
+        Arrays['Header'] = np.array(json.dumps({'colours': self.Colours, 'lastctime': self.LastCTime}))
+        with open(Path, 'wb') as f:
+            np.savez(f, **Arrays)
+
+def compileShow(Band):
+    """
+    Returns the CompiledShowCls of a BandCls or ShowCls
+    """
+    return CompiledShowCls(EngineCls(Band).getArrays(), Band.getSymbols(), Band.getColours(), Band.LastCTime)
+
+def loadCompiledShow(Path):
+    """
+    Returns the CompiledShowCls saved at "Path" (see CompiledShowCls.save)
+    """
+    with np.load(Path, allow_pickle = False) as Data:
+        Arrays = dict((Name, Data[Name]) for Name in Data.files)
+    Header = json.loads(str(Arrays.pop('Header')))
+    return CompiledShowCls(Arrays, Arrays.pop('Symbols'), Header['colours'], Header['lastctime'])
+
+def loadShow(Path,CacheDir = None,Cache = True):
+    """
+    Load a show file, and return it as a CompiledShowCls. The compiled show is
+    cached in "CacheDir", by the hash of the file contents. If the show is in the
+    cache, it is read from there, otherwise all commands are executed.
+
+    Inputs:
+    Path: show file name (JSON)
+    CacheDir (optional = None): cache folder. If None, the folder '.QuickMarchCache'
+    next to the show file is used.
+    Cache (optional = True): use the cache
+    """
+    Description = readShow(Path)
+    if CacheDir is None:
+        CacheDir = os.path.join(os.path.dirname(os.path.abspath(Path)), '.QuickMarchCache')
+    CachePath = os.path.join(CacheDir, getShowKey(Description) + '.npz')
+    if Cache and os.path.exists(CachePath):
+        try:
+            return loadCompiledShow(CachePath)
+        except (OSError, ValueError, KeyError): #Damaged cache file, compile again
+            pass
+    Compiled = compileShow(buildShow(Description))
+    if Cache:
+        if not os.path.exists(CacheDir):
+            os.makedirs(CacheDir)
+        Temp = CachePath + '.' + str(os.getpid()) + '.tmp'
+        Compiled.save(Temp)
+        os.replace(Temp, CachePath)
+    return Compiled
@@ -0,0 +1,170 @@
+import numpy as np
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Spacing checks: finds players that come too close to each other.
+
+def findClosePairs(Pos,MinDist):
+    """
+    Returns all pairs of points closer than "MinDist" to each other, as two index
+    arrays (first index lower than the second) and an array with their distances.
+    The points are binned in a uniform grid with cells of "MinDist", such that only
+    points in the same or neighbouring cells are compared.
+
+    Inputs:
+    Pos: (points x 2) array of positions
+    MinDist: distance threshold
+    """
+    Pos = np.asarray(Pos, dtype = float).reshape(-1,2)
+    Cells = np.floor(Pos / MinDist).astype(np.int64)
+    Cells -= Cells.min(axis = 0) if len(Cells) else 0
+    Width = Cells[:,1].max() + 2 if len(Cells) else 1 #Keep the neighbour of the last row apart
+    Keys = Cells[:,0] * Width + Cells[:,1]
+    Order = np.argsort(Keys, kind = 'stable')
+    Sorted = Keys[Order]
+    First = []
+    Second = []
+    #Half of the neighbourhood, so each pair of cells is visited once
+    for Offset in [0, Width - 1, Width, Width + 1, 1]:
+        Lo = np.searchsorted(Sorted, Sorted + Offset, 'left')
+        Hi = np.searchsorted(Sorted, Sorted + Offset, 'right')
+        if Offset == 0: #Same cell: only the later points
+            Lo = np.arange(len(Sorted)) + 1
+        Count = np.maximum(Hi - Lo, 0)
+        a = np.repeat(np.arange(len(Sorted)), Count)
+        b = np.arange(Count.sum()) - np.repeat(np.cumsum(Count) - Count, Count) + np.repeat(Lo, Count)
+        First.append(Order[a])
+        Second.append(Order[b])
+    First = np.concatenate(First)
+    Second = np.concatenate(Second)
+    Dist = np.hypot(*(Pos[First] - Pos[Second]).T)
+    Keep = Dist < MinDist
+    First, Second, Dist = First[Keep], Second[Keep], Dist[Keep]
+    Swap = First > Second
+    First[Swap], Second[Swap] = Second[Swap], First[Swap]
+    return First, Second, Dist
+
+
+class SpacingCls:
+    """
+    Result of checkSpacing: all pairs of players that came too close.
+
+    Attributes:
+    Band: the checked band or show
+    MinDist: distance threshold that was used
+    Times: array with the time of each close pair
+    First, Second: arrays with the player index (in Band.BandList) of each pair
+    Dist: array with the distance of each pair
+    Spacing: Dist relative to the smallest of the band separations (Band.Sep),
+    or None if the band has no Sep (e.g. a ShowCls or CompiledShowCls)
+    MinTimes, MinSpacing: time and relative spacing of the closest pair of each
+    time step with any close pair (MinSpacing is None without Sep)
+
+    Routines:
+    getPairs: returns a list of dicts, one per close pair
+    report: returns a readable report
+    """
+    def __init__(self,Band,MinDist,Times,First,Second,Dist):
+        self.Band = Band
+        self.MinDist = MinDist
+        self.Times = Times
+        self.First = First
+        self.Second = Second
+        self.Dist = Dist
+        Sep = getattr(Band, 'Sep', None)
+        self.Spacing = Dist / min(Sep) if Sep is not None else None
+        self.MinTimes, Index = np.unique(Times, return_index = True)
+        if self.Spacing is None:
+            self.MinSpacing = None
+        else:
+            self.MinSpacing = np.minimum.reduceat(self.Spacing, Index) if len(Index) else np.zeros(0)
+
+    def __len__(self):
+        return len(self.Times)
+
+    def getPairs(self):
+        """
+        Returns a list of dicts, one per close pair. The rows and columns are None
+        for a compiled show, and the spacing is None without Band.Sep.
+        """
+        Pairs = []
+        BandList = getattr(self.Band, 'BandList', None) #Not kept by a CompiledShowCls
+        Spacings = self.Spacing if self.Spacing is not None else [None] * len(self.Dist)
+        for Time, First, Second, Dist, Spacing in zip(self.Times, self.First, self.Second, self.Dist, Spacings):
+            Pair = {'time': float(Time), 'players': [int(First), int(Second)], 'rows': None, 'columns': None,
+                    'dist': float(Dist), 'spacing': None if Spacing is None else float(Spacing)}
+            if BandList is not None:
+                Players = [BandList[First], BandList[Second]]
+                Pair['rows'] = [Player.Row for Player in Players]
+                Pair['columns'] = [Player.Column for Player in Players]
+            Pairs.append(Pair)
+        return Pairs
+
+    def report(self):
+        Lines = []
+        for Pair in self.getPairs():
+            if Pair['rows'] is None:
+                Line = '{:.3f}: player {} and player {} at {:.3f}'.format(
+                       Pair['time'], Pair['players'][0] + 1, Pair['players'][1] + 1, Pair['dist'])
+            else:
+                Line = '{:.3f}: row {} column {} and row {} column {} at {:.3f}'.format(
+                       Pair['time'], Pair['rows'][0] + 1, Pair['columns'][0] + 1, Pair['rows'][1] + 1,
+                       Pair['columns'][1] + 1, Pair['dist'])
+            if Pair['spacing'] is not None:
+                Line += ' ({:.2f} x Sep)'.format(Pair['spacing'])
+            Lines.append(Line)
+        return '\n'.join(Lines)
+
+
+def checkSpacing(Band,Steps,dt,MinDist = None,Start = 0):
+    """
+    Sweep the show over time, and find all pairs of players that come closer than
+    "MinDist" to each other. The band itself is not changed.
+
+    Inputs:
+    Band: BandCls, ShowCls or CompiledShowCls object
+    Steps: number of time steps
+    dt: time in beats between each step
+    MinDist (optional = None): distance threshold. If None, half the smallest
+    separation of the band (Band.Sep) is used. Required for shows, which have
+    no Sep; their distances are only reported in absolute units.
+    Start (optional = 0): time of the first step
+
+    Returns a SpacingCls with the close pairs, sorted by time.
+    """
+    if int(Steps) < 1:
+        raise ValueError('"Steps" should be more than 0')
+    if MinDist is None:
+        if getattr(Band, 'Sep', None) is None:
+            raise ValueError('"MinDist" is required for a band without "Sep"')
+        MinDist = 0.5 * min(Band.Sep)
+    if MinDist <= 0:
+        raise ValueError('"MinDist" should be more than 0')
+    Times = []
+    First = []
+    Second = []
+    Dist = []
+    for Time, Pos, Angle in Band.iterStates(dt, Steps, Start):
+        a, b, d = findClosePairs(Pos, MinDist)
+        Order = np.lexsort((b, a))
+        Times.append(np.full(len(a), Time, dtype = float))
+        First.append(a[Order])
+        Second.append(b[Order])
+        Dist.append(d[Order])
+    return SpacingCls(Band, MinDist, np.concatenate(Times), np.concatenate(First),
+                      np.concatenate(Second), np.concatenate(Dist))
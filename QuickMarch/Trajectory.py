@@ -0,0 +1,179 @@
+import numpy as np
+import json
+import struct
+from .Engine import BandCls
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Trajectory files hold a band sampled over a time grid: a JSON header with the
+#metadata, followed by a (frames x players x 3) array of [x, y, angle], which is
+#memory-mapped when read. Layout: TrajectoryMagic, 8 byte header length (little
+#endian), JSON header, zero padding up to a multiple of 64 bytes, array data.
+TrajectoryMagic = b'QMTRAJ1\n'
+
+def exportTrajectory(Band,Path,Steps,dt,Start = 0,dtype = 'float32'):
+    """
+    Sample the band at times Start + n * dt (n = 0 ... Steps - 1) and write the
+    positions and angles of all players to a trajectory file. Frames are written
+    one at a time to the memory-mapped file, so the show does not need to fit in memory.
+    The band itself is not changed.
+
+    Inputs:
+    Band: BandCls, ShowCls or CompiledShowCls object (only iterStates, getSymbols
+    and getColours are used)
+    Path: output file name (e.g. 'show.qmt')
+    Steps: number of frames
+    dt: time in beats between each frame
+    Start (optional = 0): time of the first frame
+    dtype (optional = 'float32'): data type of the samples
+
+    Returns a TrajectoryCls of the written file.
+    """
+    if int(Steps) < 1:
+        raise ValueError('"Steps" should be more than 0')
+    Steps = int(Steps)
+    Symbols = Band.getSymbols()
+    Header = {'version': 1, 'dtype': np.dtype(dtype).str, 'frames': Steps,
+              'players': len(Symbols), 'dt': dt, 'start': Start,
+              'rows': getattr(Band, 'Rows', None), 'columns': getattr(Band, 'Columns', None), #Not set for a show
+              'sep': list(getattr(Band, 'Sep', [])),
+              'colours': Band.getColours(),
+              'symbols': Symbols.tolist()}
+    Header = json.dumps(Header).encode('utf-8')
+    Offset = len(TrajectoryMagic) + 8 + len(Header)
+    Padding = -Offset % 64
+    with open(Path, 'wb') as f:
+        f.write(TrajectoryMagic + struct.pack('<Q', len(Header)) + Header + b'\0' * Padding)
+    Data = np.memmap(Path, dtype = dtype, mode = 'r+', offset = Offset + Padding,
+                     shape = (Steps, len(Symbols), 3))
+    for Frame, (Time, Pos, Angle) in enumerate(Band.iterStates(dt, Steps, Start)):
+        Data[Frame,:,:2] = Pos
+        Data[Frame,:,2] = Angle
+    Data.flush()
+    del Data
+    return TrajectoryCls(Path)
+
+
+class TrajectoryCls:
+    """
+    A trajectory file (see exportTrajectory), opened as a memory-mapped array.
+    It has the routines that makeOutput and the renderers use from a BandCls
+    (setTime, getState, iterStates, getSymbols, getColours, plot), so it can be rendered
+    directly without evaluating the player paths.
+
+    Inputs:
+    Path: trajectory file name
+
+    Attributes:
+    Data: (frames x players x 3) memory-mapped array of [x, y, angle]
+    Header: dict with the metadata
+    dt: time in beats between each frame
+    Start: time of the first frame
+    Frames: number of frames
+    Time: current time (see setTime)
+    """
+    def __init__(self,Path):
+        self.Path = Path
+        with open(Path, 'rb') as f:
+            if f.read(len(TrajectoryMagic)) != TrajectoryMagic:
+                raise ValueError('"' + str(Path) + '" is not a QuickMarch trajectory file')
+            Length = struct.unpack('<Q', f.read(8))[0]
+            self.Header = json.loads(f.read(Length).decode('utf-8'))
+        Offset = len(TrajectoryMagic) + 8 + Length
+        Offset += -Offset % 64
+        self.Frames = self.Header['frames']
+        self.dt = self.Header['dt']
+        self.Start = self.Header['start']
+        self.Rows = self.Header['rows']
+        self.Columns = self.Header['columns']
+        self.Data = np.memmap(Path, dtype = self.Header['dtype'], mode = 'r', offset = Offset,
+                              shape = (self.Frames, self.Header['players'], 3))
+        self.Frame = 0
+        self.Time = self.Start
+
+    def __getstate__(self):
+        return {'Path': self.Path, 'Frame': self.Frame}
+
+    def __setstate__(self,State): #Map the file again, instead of pickling the data
+        self.__init__(State['Path'])
+        self.setFrame(State['Frame'])
+
+    def getFrame(self,Time):
+        """
+        Returns the frame number of time "Time", which must be on the time grid of the file
+        """
+        Frame = int(round((Time - self.Start) / self.dt))
+        if abs(self.Start + Frame * self.dt - Time) > 1e-6 * self.dt:
+            raise ValueError('Time ' + str(Time) + ' is not on the time grid of the trajectory')
+        return Frame
+
+    def setFrame(self,Frame):
+        if not 0 <= Frame < self.Frames:
+            raise ValueError('Frame ' + str(Frame) + ' is outside the trajectory (' + str(self.Frames) + ' frames)')
+        self.Frame = Frame
+        self.Time = self.Start + Frame * self.dt
+
+    def setTime(self,NewTime):
+        """
+        Set the time. This must be a sample time of the file.
+        """
+        self.setFrame(self.getFrame(NewTime))
+
+    def getState(self,Frame = None):
+        """
+        Returns the positions (players x 2 array) and angles (array) of all players
+        at the current frame, or at frame "Frame"
+        """
+        if Frame is None:
+            Frame = self.Frame
+        Sample = np.asarray(self.Data[Frame], dtype = float)
+        return Sample[:,:2], Sample[:,2]
+
+    def iterTimes(self,Times):
+        """
+        Generator of the states at "Times" (see BandCls.iterTimes). The times
+        must be sample times of the file.
+        """
+        for Time in Times:
+            Pos, Angle = self.getState(self.getFrame(Time))
+            Pos.flags.writeable = False
+            Angle.flags.writeable = False
+            yield Time, Pos, Angle
+
+    def iterStates(self,dt,Steps,Start = 0):
+        """
+        Generator of the states at times Start + n * dt (see BandCls.iterStates)
+        """
+        return self.iterTimes(Start + Step * dt for Step in range(int(Steps)))
+
+    def getSymbols(self):
+        Symbols = self.Header['symbols']
+        Vertices = max([len(Symbol) for Symbol in Symbols] + [1])
+        Result = np.zeros((len(Symbols), Vertices, 2))
+        for Index, Symbol in enumerate(Symbols):
+            Result[Index] = Symbol + [Symbol[-1]] * (Vertices - len(Symbol))
+        return Result
+
+    def getColours(self):
+        return list(self.Header['colours'])
+
+    def plot(self,Path,Fig = None,ax = None, limits = [[-20,20],[-60,65]], dpi = 150):
+        """
+        Make a plot of the current frame (see BandCls.plot)
+        """
+        return BandCls.plot(self,Path,Fig,ax,limits,dpi)
@@ -0,0 +1,189 @@
+import numpy as np
+import time
+from .Render import loadPyplot, symbolVertices, symbolRadius, visiblePlayers, lineMargin, fitLimits
+
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#Interactive viewer. The show is played with a matplotlib animation, in which only
+#the players (and the time) are redrawn on a saved background (blitting). The
+#state is evaluated directly at the time that is shown, so seeking to any time is
+#as fast as playing.
+
+class ViewerCls:
+    """
+    Interactive viewer of a band. It plays the show in real time, with a slider
+    to seek to any time. Keys: space to play or pause, left and right to step
+    one beat back or forward.
+
+    The viewer can be tested without a display: create it (with the Agg backend),
+    and call update (with a "Clock" that is controlled by the test) or seek.
+
+    Inputs:
+    Band: BandCls object (or another object with iterTimes, getSymbols and getColours,
+    e.g. a ShowCls)
+    limits (optional = 'auto'): plot limits as list of lists: [[xmin, xmax],[ymin, ymax]],
+    or 'auto' to fit the limits to the whole show (see fitLimits)
+    bpm (optional = 120): beats per minute of the playback
+    End (optional = None): end time of the slider, in beats. If None, Band.LastCTime.
+    Interval (optional = 20): time between animation frames in ms
+    Clock (optional = time.perf_counter): function that returns the current time in seconds
+
+    Attributes:
+    Time: the time that is shown, in beats
+    Playing: bool, True while playing
+
+    Routines:
+    update: advance the time with the clock, and draw (the animation function)
+    seek: show the band at a time
+    play, pause, toggle: start or stop the playback
+    show: start the animation, and show the window
+    """
+    def __init__(self,Band,limits = 'auto',bpm = 120,End = None,Interval = 20,Clock = time.perf_counter):
+        from matplotlib.collections import PolyCollection
+        from matplotlib.widgets import Slider
+        self.plt = loadPyplot(Batch = False)
+        self.Band = Band
+        self.bpm = bpm
+        self.End = Band.LastCTime if End is None else End
+        if self.End <= 0:
+            raise ValueError('"End" should be more than 0')
+        self.Interval = Interval
+        self.Clock = Clock
+        self.Symbols = Band.getSymbols()
+        self.Colours = Band.getColours()
+        if isinstance(limits, str):
+            limits = fitLimits(Band, int(self.End / 0.25) + 1, 0.25)
+        self.Limits = limits
+        self.Time = 0.0
+        self.Playing = False
+        self.Start = None #[clock, time] at the start of the playback
+        self.Animation = None
+
+        self.Fig = self.plt.figure()
+        self.ax = self.Fig.add_axes([0.05, 0.12, 0.9, 0.85])
+        self.ax.axis('equal')
+        self.ax.axis('off')
+        self.ax.set_xlim(limits[0])
+        self.ax.set_ylim(limits[1])
+        self.Collection = PolyCollection([], facecolors = self.Colours, edgecolors = self.Colours,
+                                         joinstyle = 'miter', animated = True)
+        self.ax.add_collection(self.Collection)
+        self.Text = self.ax.text(0.01, 0.99, '', transform = self.ax.transAxes, va = 'top', animated = True)
+        self.Radius = symbolRadius(self.Symbols) + lineMargin(self.ax, limits)
+        self.Shown = None #Indices of the players in the collection
+        self.Slider = Slider(self.Fig.add_axes([0.15, 0.03, 0.7, 0.03]), 'Beat', 0, self.End, valinit = 0)
+        self.Slider.on_changed(self.seek)
+        self.Fig.canvas.mpl_connect('key_press_event', self.onKey)
+        self.draw()
+
+    def getState(self,Time):
+        """
+        Returns the positions and angles of the players at "Time"
+        """
+        return next(iter(self.Band.iterTimes([Time])))[1:]
+
+    def draw(self):
+        """
+        Update the players and the time text to the current time. Returns the changed artists.
+        """
+        Pos, Angle = self.getState(self.Time)
+        Shown = visiblePlayers(Pos, self.Radius, self.Limits)
+        if self.Shown is None or not np.array_equal(Shown, self.Shown):
+            self.Shown = Shown
+            Colours = [self.Colours[Index] for Index in Shown]
+            self.Collection.set_facecolors(Colours)
+            self.Collection.set_edgecolors(Colours)
+        self.Collection.set_verts(symbolVertices(self.Symbols[Shown], Pos[Shown], Angle[Shown]))
+        self.Text.set_text('Beat ' + '{:.2f}'.format(self.Time))
+        return [self.Collection, self.Text]
+
+    def update(self,Frame = None):
+        """
+        Animation function: set the time from the clock (while playing), and draw.
+        At the end of the show, the playback starts again at 0.
+        """
+        if self.Playing:
+            Now = self.Clock()
+            self.Time = self.Start[1] + (Now - self.Start[0]) * self.bpm / 60
+            if self.Time > self.End:
+                self.Time = 0.0
+                self.Start = [Now, 0.0]
+        return self.draw()
+
+    def seek(self,Time):
+        """
+        Show the band at "Time" (beats). While playing, the playback continues from there.
+        """
+        self.Time = min(max(float(Time), 0.0), self.End)
+        if self.Playing:
+            self.Start = [self.Clock(), self.Time]
+        self.draw() #Shown by the next frame of the animation
+
+    def play(self):
+        self.Playing = True
+        self.Start = [self.Clock(), self.Time]
+
+    def pause(self):
+        self.update()
+        self.Playing = False
+        self.Slider.set_val(self.Time) #Only moved when paused, to keep the playback fast
+
+    def toggle(self):
+        if self.Playing:
+            self.pause()
+        else:
+            self.play()
+
+    def onKey(self,Event):
+        if Event.key == ' ':
+            self.toggle()
+        elif Event.key == 'left':
+            self.seek(self.Time - 1)
+        elif Event.key == 'right':
+            self.seek(self.Time + 1)
+
+    def start(self):
+        """
+        Start the animation, without showing the window
+        """
+        from matplotlib.animation import FuncAnimation
+        if self.Animation is None:
+            self.Animation = FuncAnimation(self.Fig, self.update, interval = self.Interval, blit = True,
+                                           cache_frame_data = False)
+        self.play()
+
+    def show(self):
+        """
+        Start the playback, and show the viewer window (blocks until it is closed)
+        """
+        self.start()
+        self.plt.show()
+
+    def close(self):
+        if self.Animation is not None:
+            self.Animation.event_source.stop()
+        self.plt.close(self.Fig)
+
+
+def view(Band,**Options):
+    """
+    Show the band in an interactive viewer (see ViewerCls for the options)
+    """
+    Viewer = ViewerCls(Band,**Options)
+    Viewer.show()
+    return Viewer
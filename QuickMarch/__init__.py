@@ -0,0 +1,39 @@
+# Copyright 2019 Wouter Franssen
+
+# This file is part of QuickMarch.
+#
+# QuickMarch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# QuickMarch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with QuickMarch. If not, see <http://www.gnu.org/licenses/>.
+
+#QuickMarch is split in modules, of which all routines are available from the package:
+#Engine: players, path segments, the band and the array-backed engine
+#Commands: path builders (QuickMarchBase, BendBase) and band commands (QuickMarch, Bend, ...)
+#Trajectory: sampled trajectory files
+#Show: several bands on a common timeline
+#ShowFile: show files (JSON) and compiled shows
+#Spacing: checks for players that come too close
+#Render: rendering backends
+#Output: makeOutput and the frame encoding
+#Viewer: interactive viewer
+#Importing QuickMarch does not load matplotlib. It is loaded (with the Agg backend,
+#see loadPyplot) when a band is plotted or rendered with the matplotlib backend.
+
+from .Engine import *
+from .Commands import *
+from .Trajectory import *
+from .Show import *
+from .ShowFile import *
+from .Spacing import *
+from .Render import *
+from .Output import *
+from .Viewer import *